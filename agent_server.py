@@ -0,0 +1,283 @@
+import hmac
+import json
+import secrets
+import time
+import uuid
+import asyncio
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import cohere
+import config
+from rich.console import Console
+from rich.panel import Panel
+
+from main_agent import KalaSahayakLangGraphAgent
+from knowledge_graph import KnowledgeGraph
+from chroma_manager import ChromaDBManager
+from loop_lag_monitor import LoopLagMonitor
+from memory_compactor import MemoryCompactor, make_cohere_summarizer
+
+
+class SessionBusyError(Exception):
+    pass
+
+
+class UnauthorizedError(Exception):
+    pass
+
+
+class UnknownSessionError(Exception):
+    pass
+
+
+class AgentSession:
+    def __init__(self, session_id: str, role: str, queue_size: int):
+        self.session_id = session_id
+        self.role = role
+        self.secret = secrets.token_urlsafe(32)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.worker: Optional[asyncio.Task] = None
+        self.last_command = ""
+        self.last_plan = None
+        self.last_active = time.monotonic()
+
+
+class AgentSessionHost:
+    def __init__(self, server_url: str = "http://localhost:8080", language: str = "en-IN", max_sessions: int = 200,
+                 queue_size: int = 4, max_concurrent_turns: int = 32, idle_timeout: float = 1800.0, owner_token: Optional[str] = None):
+        self.console = Console()
+        self.server_url = server_url
+        self.owner_token = owner_token
+        self.language = language
+        self.max_sessions = max_sessions
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self.turn_semaphore = asyncio.Semaphore(max_concurrent_turns)
+        self.sessions: Dict[str, AgentSession] = {}
+        self.agents: Dict[str, KalaSahayakLangGraphAgent] = {}
+        self.mcp_pool = None
+        self.knowledge_graph: Optional[KnowledgeGraph] = None
+        self.chroma_manager: Optional[ChromaDBManager] = None
+        self.memory_compactor: Optional[MemoryCompactor] = None
+        self.blocking_executor = ThreadPoolExecutor(max_workers=getattr(config, "AGENT_BLOCKING_WORKERS", 32), thread_name_prefix="kala-blocking")
+        self.loop_lag_monitor = LoopLagMonitor()
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self.mcp_pool = await KalaSahayakLangGraphAgent.create_mcp_pool(self.server_url).start()
+        self.knowledge_graph = KnowledgeGraph()
+        self.chroma_manager = ChromaDBManager(
+            batch_size=getattr(config, "CHROMA_WRITE_BATCH_SIZE", 32),
+            flush_interval=getattr(config, "CHROMA_FLUSH_INTERVAL", 0.5)
+        )
+        cohere_client = cohere.Client(api_key=config.COHERE_API_KEY)
+        shared_clients = {
+            "cohere_client": cohere_client,
+            "knowledge_graph": self.knowledge_graph,
+            "chroma_manager": self.chroma_manager,
+            "blocking_executor": self.blocking_executor,
+            "loop_lag_monitor": self.loop_lag_monitor,
+        }
+        for role in ("owner", "customer"):
+            self.agents[role] = await KalaSahayakLangGraphAgent.create(role=role, language=self.language, mcp_pool=self.mcp_pool, **shared_clients)
+        self._reaper_task = asyncio.create_task(self._reap_idle_sessions())
+        compaction_interval = getattr(config, "CHROMA_COMPACTION_INTERVAL", 3600.0)
+        if compaction_interval:
+            self.memory_compactor = MemoryCompactor(
+                self.chroma_manager,
+                summarizer=make_cohere_summarizer(cohere_client),
+                keep_recent_turns=getattr(config, "CHROMA_COMPACTION_KEEP_RECENT_TURNS", 50),
+                tool_retention_days=getattr(config, "CHROMA_TOOL_RETENTION_DAYS", 7.0),
+                interval=compaction_interval
+            ).start()
+        if getattr(config, "LOOP_LAG_MONITOR", True):
+            self.loop_lag_monitor.start()
+        return self
+
+    def _get_or_create_session(self, session_id: Optional[str], session_secret: Optional[str], role: str) -> AgentSession:
+        if role not in self.agents:
+            raise ValueError(f"Unknown role '{role}'. Expected one of {list(self.agents)}.")
+        if session_id:
+            session = self.sessions.get(session_id)
+            if not session or not hmac.compare_digest(str(session_secret or "").encode(), session.secret.encode()):
+                raise UnknownSessionError(f"Unknown session {session_id} or wrong session_secret. Omit session_id to start a new session.")
+            if session.role != role:
+                raise ValueError(f"Session {session_id} belongs to role '{session.role}'.")
+            return session
+        if len(self.sessions) >= self.max_sessions:
+            raise SessionBusyError("Maximum number of concurrent sessions reached.")
+        session = AgentSession(str(uuid.uuid4()), role, self.queue_size)
+        session.worker = asyncio.create_task(self._session_worker(session))
+        self.sessions[session.session_id] = session
+        return session
+
+    def role_for(self, token: Optional[str]) -> str:
+        if not token:
+            return "customer"
+        if self.owner_token and hmac.compare_digest(str(token).encode(), self.owner_token.encode()):
+            return "owner"
+        raise UnauthorizedError("Invalid owner token.")
+
+    def submit(self, text: str, session: AgentSession, kind: str = "message") -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        try:
+            session.queue.put_nowait((kind, text, future))
+        except asyncio.QueueFull:
+            raise SessionBusyError(f"Session {session.session_id} already has {self.queue_size} pending message(s).")
+        session.last_active = time.monotonic()
+        return future
+
+    async def _session_worker(self, session: AgentSession):
+        while True:
+            kind, text, future = await session.queue.get()
+            try:
+                async with self.turn_semaphore:
+                    result = await self._handle_turn(session, kind, text)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                session.last_active = time.monotonic()
+                session.queue.task_done()
+
+    async def _handle_turn(self, session: AgentSession, kind: str, text: str) -> dict:
+        agent = self.agents[session.role]
+        if kind == "feedback":
+            if not (session.role == "owner" and session.last_plan):
+                return {"session_id": session.session_id, "error": "no_plan_to_review"}
+            command, plan = session.last_command, session.last_plan
+            session.last_plan = None
+            if text.lower() in ["yes", "y"]:
+                await asyncio.to_thread(self.knowledge_graph.store_successful_plan, command, plan)
+                return {"session_id": session.session_id, "response": "✅ Glad I could help! Plan saved."}
+            await asyncio.to_thread(self.knowledge_graph.store_failed_plan, command, plan, text)
+            if text.lower() in ["no", "n"]:
+                return {"session_id": session.session_id, "response": "📝 Understood. Let's try a different approach."}
+            correction_message = f"My previous attempt was incorrect. The user provided this feedback: '{text}'. Please create a new plan."
+            response_text, last_plan = await agent.get_agent_response(session.session_id, correction_message, is_feedback=True)
+            session.last_plan = last_plan
+        else:
+            response_text, last_plan = await agent.get_agent_response(session.session_id, text)
+            session.last_command, session.last_plan = text, last_plan
+        return {
+            "session_id": session.session_id,
+            "response": response_text,
+            "awaiting_feedback": bool(session.role == "owner" and session.last_plan)
+        }
+
+    async def _reap_idle_sessions(self):
+        while True:
+            await asyncio.sleep(min(60.0, self.idle_timeout))
+            now = time.monotonic()
+            for session_id, session in list(self.sessions.items()):
+                if session.queue.empty() and now - session.last_active > self.idle_timeout:
+                    session.worker.cancel()
+                    del self.sessions[session_id]
+                    await self.agents[session.role].forget_session(session_id)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        pending = set()
+
+        async def reply(payload: dict):
+            async with write_lock:
+                writer.write((json.dumps(payload, default=str) + "\n").encode())
+                await writer.drain()
+
+        async def process(request: dict):
+            request_id = request.get("request_id")
+            try:
+                text, role = request["text"], self.role_for(request.get("token"))
+                session = self._get_or_create_session(request.get("session_id"), request.get("session_secret"), role)
+                result = await self.submit(text, session, kind=request.get("type", "message"))
+                if not request.get("session_id"):
+                    result["session_secret"] = session.secret
+            except SessionBusyError as e:
+                result = {"session_id": request.get("session_id"), "error": "busy", "message": str(e)}
+            except UnauthorizedError as e:
+                result = {"session_id": request.get("session_id"), "error": "unauthorized", "message": str(e)}
+            except UnknownSessionError as e:
+                result = {"session_id": request.get("session_id"), "error": "unknown_session", "message": str(e)}
+            except (KeyError, ValueError) as e:
+                result = {"session_id": request.get("session_id"), "error": "bad_request", "message": str(e)}
+            except Exception as e:
+                self.console.print(Panel(f"Session error: {e}\n\n{traceback.format_exc()}", title="[bold red]Agent Server Error[/]", border_style="red"))
+                result = {"session_id": request.get("session_id"), "error": "internal_error", "message": str(e)}
+            await reply({"request_id": request_id, **result})
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    await reply({"error": "bad_request", "message": f"Invalid JSON: {e}"})
+                    continue
+                task = asyncio.create_task(process(request))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        self.console.print(Panel(f"[bold green]🚀 Kala-Sahayak Agent Server listening on {host}:{port}[/] (newline-delimited JSON)", title="🖥️ Server Status", border_style="green"))
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._reaper_task:
+            self._reaper_task.cancel()
+        for session in self.sessions.values():
+            session.worker.cancel()
+        await asyncio.gather(*(s.worker for s in self.sessions.values()), return_exceptions=True)
+        self.sessions.clear()
+        for agent in self.agents.values():
+            await agent.close()
+        await self.loop_lag_monitor.stop()
+        self.loop_lag_monitor.report(title="⏱️ Agent Server Event Loop Lag")
+        if self.mcp_pool:
+            await self.mcp_pool.close()
+        if self.memory_compactor:
+            await asyncio.to_thread(self.memory_compactor.stop)
+            if self.memory_compactor.last_stats:
+                self.memory_compactor.report()
+        if self.chroma_manager:
+            await asyncio.to_thread(self.chroma_manager.close)
+        self.blocking_executor.shutdown(wait=False)
+        if self.knowledge_graph:
+            self.knowledge_graph.close()
+
+
+async def main_async():
+    parser = argparse.ArgumentParser(description="Kala-Sahayak multi-session agent server")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tool-server", type=str, default="http://localhost:8080")
+    args = parser.parse_args()
+    host = AgentSessionHost(
+        server_url=args.tool_server,
+        max_sessions=getattr(config, "AGENT_SERVER_MAX_SESSIONS", 200),
+        queue_size=getattr(config, "AGENT_SERVER_SESSION_QUEUE_SIZE", 4),
+        max_concurrent_turns=getattr(config, "AGENT_SERVER_MAX_CONCURRENT_TURNS", 32),
+        idle_timeout=getattr(config, "AGENT_SERVER_IDLE_TIMEOUT", 1800.0),
+        owner_token=getattr(config, "AGENT_SERVER_OWNER_TOKEN", None)
+    )
+    try:
+        await host.start()
+        await host.serve(args.host, args.port)
+    finally:
+        await host.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main_async())
+    except KeyboardInterrupt:
+        print("\n👋 Agent server shutdown by user.")
@@ -66,40 +66,53 @@ class BusinessIntelligenceAPI:
             self._log_error("Content Calendar Error", f"LLM failed to generate structured calendar: {e}", e)
             return {"error": str(e)}
 
+    def _forecast_revenue(self, sales: pd.DataFrame, forecast_periods: int, title: str) -> dict:
+        if len(sales) < 10:
+            raise ValueError(f"Not enough data points ({len(sales)}) to generate a reliable forecast. At least 10 are needed.")
+        series = sales['daily_revenue'].asfreq('D').fillna(0)
+        model = ARIMA(series, order=(5, 1, 0))
+        model_fit = model.fit()
+        forecast = model_fit.forecast(steps=forecast_periods)
+        forecast_data = {str(k.date()): v for k, v in forecast.round(2).to_dict().items()}
+        recommendation = (f"Projected sales for the next period: {list(forecast_data.values())[0]}. Adjust inventory accordingly.")
+        rprint(Panel(f"[bold green]✅ Forecast complete![/bold green]\n[bold]Forecast:[/bold] {forecast_data}\n[bold]💡 Tip:[/bold] {recommendation}", title=title))
+        return {"status": "success", "forecast": forecast_data, "recommendation": recommendation}
+
+    def forecast_sales(self, sales: pd.DataFrame, forecast_periods: int = 3, product_name: str = None) -> dict:
+        title = "Overall Sales Forecasting" if not product_name else f"Sales Forecasting for '{product_name}'"
+        try:
+            if product_name and sales.empty:
+                raise ValueError(f"No sales data found for product: '{product_name}'")
+            rprint(Panel(f"[cyan]📈 Forecasting from {len(sales)} day(s) of sales data...[/cyan]", title=title))
+            return self._forecast_revenue(sales, forecast_periods, title)
+        except Exception as e:
+            self._log_error("Forecasting Error", f"Failed to generate forecast: {e}", e)
+            return {"error": str(e)}
+
     def predictive_sales_forecast(self, sales_csv_path: str, forecast_periods: int = 3, product_name: str = None):
         try:
             if not os.path.exists(sales_csv_path):
-                raise FileNotFoundError(f"CSV not found at {sales_csv_path}")
+                raise FileNotFoundError(f"Sales data not found at {sales_csv_path}")
             
             title = "Overall Sales Forecasting" if not product_name else f"Sales Forecasting for '{product_name}'"
             rprint(Panel(f"[cyan]📈 Reading sales data from '{sales_csv_path}'...[/cyan]", title=title))
             
-            df = pd.read_csv(sales_csv_path, parse_dates=['date'])
+            if sales_csv_path.endswith(".parquet") or os.path.isdir(sales_csv_path):
+                df = pd.read_parquet(sales_csv_path)
+            else:
+                df = pd.read_csv(sales_csv_path, parse_dates=['date'])
+            df = df.drop_duplicates(subset=['date', 'product_name'], keep='last')
             
             if product_name:
                 df = df[df['product_name'].str.lower() == product_name.lower()]
                 if df.empty:
                     raise ValueError(f"No sales data found for product: '{product_name}'")
-                sales_column = 'daily_revenue'
             else:
                 df = df.groupby('date').sum(numeric_only=True).reset_index()
-                sales_column = 'daily_revenue'
-            
-            if len(df) < 10:
-                raise ValueError(f"Not enough data points ({len(df)}) to generate a reliable forecast. At least 10 are needed.")
 
             df = df.set_index('date')
             df.index = pd.to_datetime(df.index)
-            df = df.asfreq('D')
-            df[sales_column] = df[sales_column].fillna(0)
-            
-            model = ARIMA(df[sales_column], order=(5, 1, 0))
-            model_fit = model.fit()
-            forecast = model_fit.forecast(steps=forecast_periods)
-            forecast_data = {str(k.date()): v for k, v in forecast.round(2).to_dict().items()}
-            recommendation = (f"Projected sales for the next period: {list(forecast_data.values())[0]}. Adjust inventory accordingly.")
-            rprint(Panel(f"[bold green]✅ Forecast complete![/bold green]\n[bold]Forecast:[/bold] {forecast_data}\n[bold]💡 Tip:[/bold] {recommendation}", title=title))
-            return {"status": "success", "forecast": forecast_data, "recommendation": recommendation}
+            return self._forecast_revenue(df, forecast_periods, title)
         except Exception as e:
             self._log_error("Forecasting Error", f"Failed to generate forecast: {e}", e)
             return {"error": str(e)}
@@ -208,12 +221,13 @@ if __name__ == "__main__":
         p1 = db.add_product("Leather Wallet", "Hand-stitched", 49.99, 100)
         c1 = db.add_customer("Alex Wilton", "alex@example.com")
         
-        for i in range(90):
-            day = datetime.now(UTC) - timedelta(days=i)
+        days = [datetime.now(UTC) - timedelta(days=i) for i in range(90)]
+        orders = []
+        for day in days:
             quantity = 5 + (day.weekday() // 4) * 3 + random.randint(-2, 2) 
             if quantity > 0:
-                db.create_order_and_shipment(c1, [{"product_id": p1, "quantity": quantity, "price_per_item": 49.99}], "Addr 1", order_date=day)
-                db.update_daily_sales(for_date=day)
+                orders.append({"customer_identifier": c1, "items": [{"product_id": p1, "quantity": quantity, "price_per_item": 49.99}], "shipping_address": "Addr 1", "order_date": day})
+        db.bulk_create_orders(orders)
         
         console.print("✅ Database populated with 90 days of sales history.")
         
@@ -221,10 +235,8 @@ if __name__ == "__main__":
         bi_tool.generate_content_calendar(topic="new line of handcrafted pottery", duration_days=3)
 
         console.rule("\n[bold]Step 2: Sales Forecasting[/bold]")
-        sales_csv_file = os.path.join(output_dir, "sales_data_from_db.csv")
-        db.export_sales_to_csv(sales_csv_file)
-        bi_tool.predictive_sales_forecast(sales_csv_path=sales_csv_file)
-        bi_tool.predictive_sales_forecast(sales_csv_path=sales_csv_file, product_name="Leather Wallet")
+        bi_tool.forecast_sales(db.get_daily_sales_frame())
+        bi_tool.forecast_sales(db.get_daily_sales_frame(product_name="Leather Wallet"), product_name="Leather Wallet")
 
         console.rule("\n[bold]Step 3: Document Generation[/bold]")
         invoice_path = os.path.join(output_dir, "invoice_DEMO-001.pdf")
@@ -1,17 +1,194 @@
 import chromadb
+import os
 import uuid
 import json
+import atexit
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from rich import print as rprint
 from rich.panel import Panel
+from embedding_provider import CachedEmbeddingFunction, get_embedding_function
 
 class ChromaDBManager:
-    def __init__(self, path="./chroma_db", collection_name="kala_sahayak_memory"):
+    def __init__(self, path="./chroma_db", collection_name="kala_sahayak_memory", batch_size: int = 32, flush_interval: float = 0.5, cache_size: int = 512, embedding_function: CachedEmbeddingFunction = None, max_write_retries: int = 3):
         self.client = chromadb.PersistentClient(path=path)
+        self.embedding_function = embedding_function or get_embedding_function()
         self.collection = self.client.get_or_create_collection(name=collection_name)
+        self._has_documents = self.collection.count() > 0
+        self.cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._query_embeddings = OrderedDict()
+        self._recall_cache = OrderedDict()
+        self._session_generations = defaultdict(int)
+        self._seq_lock = threading.Lock()
+        self._next_seq = {}
+        self._index_conn = sqlite3.connect(os.path.join(path, "kala_session_index.db"), check_same_thread=False)
+        with self._index_conn:
+            self._index_conn.execute("CREATE TABLE IF NOT EXISTS session_index (session_id TEXT PRIMARY KEY, next_seq INTEGER NOT NULL)")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_write_retries = max_write_retries
+        self._write_attempts = {}
+        self._pending = []
+        self._pending_sessions = set()
+        self._pending_cond = threading.Condition()
+        self._write_lock = threading.RLock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="chroma-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
         rprint(Panel.fit("[green]✅ ChromaDB Manager Initialized[/green]"))
 
+    def _write_loop(self):
+        while True:
+            with self._pending_cond:
+                self._pending_cond.wait_for(lambda: self._closed or len(self._pending) >= self.batch_size, timeout=self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self, session_id: str = None):
+        with self._write_lock:
+            with self._pending_cond:
+                if session_id is not None and session_id not in self._pending_sessions:
+                    return
+                batch, self._pending = self._pending, []
+                self._pending_sessions.clear()
+            if not batch:
+                return
+            try:
+                documents = [content for _, content, _ in batch]
+                self.collection.add(
+                    ids=[doc_id for doc_id, _, _ in batch],
+                    embeddings=self.embedding_function(documents),
+                    documents=documents,
+                    metadatas=[metadata for _, _, metadata in batch]
+                )
+            except Exception as e:
+                self._requeue(batch, e)
+                return
+            self._has_documents = True
+            for doc_id, _, _ in batch:
+                self._write_attempts.pop(doc_id, None)
+            self._persist_next_seq(batch)
+
+    def _requeue(self, batch: list, error: Exception):
+        retry = []
+        for item in batch:
+            attempts = self._write_attempts.get(item[0], 0) + 1
+            if attempts < self.max_write_retries:
+                self._write_attempts[item[0]] = attempts
+                retry.append(item)
+            else:
+                self._write_attempts.pop(item[0], None)
+        with self._pending_cond:
+            self._pending[:0] = retry
+            self._pending_sessions.update(metadata["session_id"] for _, _, metadata in retry)
+        dropped = len(batch) - len(retry)
+        outcome = f"dropped {dropped} after {self.max_write_retries} attempts" if dropped else f"will retry {len(retry)}"
+        rprint(Panel(f"[red]❌ ChromaDB batch write of {len(batch)} message(s) failed ({outcome}):[/red] {error}", title="ChromaDB Error"))
+
+    def close(self):
+        with self._pending_cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending_cond.notify_all()
+        self._writer.join()
+        while self._pending:
+            self.flush()
+        with self._seq_lock:
+            self._index_conn.close()
+
+    def _persist_next_seq(self, batch: list):
+        next_seqs = {}
+        for _, _, metadata in batch:
+            next_seqs[metadata["session_id"]] = max(next_seqs.get(metadata["session_id"], 0), metadata["seq"] + 1)
+        with self._seq_lock, self._index_conn:
+            self._index_conn.executemany(
+                "INSERT INTO session_index (session_id, next_seq) VALUES (?, ?) ON CONFLICT(session_id) DO UPDATE SET next_seq = MAX(next_seq, excluded.next_seq)",
+                list(next_seqs.items())
+            )
+
+    def _allocate_seq(self, session_id: str) -> int:
+        with self._seq_lock:
+            if session_id not in self._next_seq:
+                row = self._index_conn.execute("SELECT next_seq FROM session_index WHERE session_id = ?", (session_id,)).fetchone()
+                self._next_seq[session_id] = row[0] if row else self._migrate_legacy_session(session_id)
+            seq = self._next_seq[session_id]
+            self._next_seq[session_id] = seq + 1
+            return seq
+
+    def _current_next_seq(self, session_id: str) -> int:
+        with self._seq_lock:
+            if session_id in self._next_seq:
+                return self._next_seq[session_id]
+            row = self._index_conn.execute("SELECT next_seq FROM session_index WHERE session_id = ?", (session_id,)).fetchone()
+            if row:
+                return row[0]
+            self._next_seq[session_id] = self._migrate_legacy_session(session_id)
+            return self._next_seq[session_id]
+
+    def _migrate_legacy_session(self, session_id: str) -> int:
+        if not self._has_documents or not self.collection.get(where={"session_id": session_id}, limit=1, include=[])["ids"]:
+            return 0
+        results = self.collection.get(where={"session_id": session_id}, include=["metadatas"])
+        ordered = sorted(zip(results["ids"], results["metadatas"]), key=lambda item: (item[1].get("seq", -1), item[1]["timestamp"]))
+        ids, metadatas = [], []
+        for seq, (doc_id, metadata) in enumerate(ordered):
+            ids.append(doc_id)
+            metadatas.append({**metadata, "seq": seq})
+        self.collection.update(ids=ids, metadatas=metadatas)
+        with self._index_conn:
+            self._index_conn.execute("INSERT OR REPLACE INTO session_index (session_id, next_seq) VALUES (?, ?)", (session_id, len(ids)))
+        rprint(Panel(f"[cyan]🗂️ Indexed {len(ids)} legacy message(s) for session:[/cyan] {session_id}", title="ChromaDB Maintenance"))
+        return len(ids)
+
+    def reembed_documents(self, page_size: int = 1024) -> int:
+        self.flush()
+        total, offset = 0, 0
+        while True:
+            with self._write_lock:
+                page = self.collection.get(limit=page_size, offset=offset, include=["documents"])
+                if not page["ids"]:
+                    break
+                self.collection.update(ids=page["ids"], embeddings=self.embedding_function.embed_many(page["documents"]))
+            total += len(page["ids"])
+            offset += page_size
+        with self._cache_lock:
+            self._query_embeddings.clear()
+            self._recall_cache.clear()
+        rprint(Panel(f"[cyan]🔁 Re-embedded {total} message(s) with {self.embedding_function.provider} / {self.embedding_function.model_name}[/cyan]", title="ChromaDB Maintenance"))
+        return total
+
+    def _cache_get(self, cache: OrderedDict, key):
+        with self._cache_lock:
+            if key not in cache:
+                return None
+            cache.move_to_end(key)
+            return cache[key]
+
+    def _cache_put(self, cache: OrderedDict, key, value):
+        with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def _invalidate_session(self, session_id: str):
+        with self._cache_lock:
+            self._session_generations[session_id] += 1
+
+    def _embed_query(self, query: str):
+        embedding = self._cache_get(self._query_embeddings, query)
+        if embedding is None:
+            embedding = self.embedding_function([query])[0]
+            self._cache_put(self._query_embeddings, query, embedding)
+        return embedding
+
     def add_owner_message(self, session_id: str, content: str, language: str):
         self._add_message(session_id=session_id, role="USER", content=content, language=language, speaker_type="owner")
 
@@ -26,9 +203,15 @@ class ChromaDBManager:
         self._add_message(session_id=session_id, role="TOOL", content=content, language=language, speaker_type="agent")
 
     def retrieve_relevant_memories(self, session_id: str, query: str, allowed_speaker_types: List[str], k: int = 5) -> List[str]:
-        if self.collection.count() == 0:
+        self.flush(session_id)
+        if not self._has_documents:
             return []
-            
+
+        cache_key = (session_id, self._session_generations[session_id], query, tuple(sorted(allowed_speaker_types)), k)
+        cached = self._cache_get(self._recall_cache, cache_key)
+        if cached is not None:
+            return list(cached)
+
         where_clause = {
             "$and": [
                 {"session_id": session_id},
@@ -38,35 +221,44 @@ class ChromaDBManager:
         
         try:
             results = self.collection.query(
-                query_texts=[query],
+                query_embeddings=[self._embed_query(query)],
                 n_results=k,
                 where=where_clause
             )
-            recalled_docs = results.get('documents', [[]])[0]
-            return recalled_docs if recalled_docs else []
+            recalled_docs = results.get('documents', [[]])[0] or []
+            self._cache_put(self._recall_cache, cache_key, list(recalled_docs))
+            return recalled_docs
         except Exception as e:
             rprint(Panel(f"[red]❌ ChromaDB query failed:[/red] {e}", title="ChromaDB Error"))
             return []
 
     def get_formatted_history(self, session_id: str, limit: int = 25):
-        if self.collection.count() == 0:
-            return []
+        return self.get_history_page(session_id, limit=limit)["history"]
+
+    def get_history_page(self, session_id: str, limit: int = 25, before_seq: Optional[int] = None) -> dict:
+        self.flush(session_id)
+        if not self._has_documents:
+            return {"history": [], "next_before_seq": None}
+
+        end_seq = self._current_next_seq(session_id) if before_seq is None else before_seq
+        start_seq = max(0, end_seq - limit)
+        if end_seq <= 0:
+            return {"history": [], "next_before_seq": None}
 
         results = self.collection.get(
-            where={"session_id": session_id},
+            where={"$and": [{"session_id": session_id}, {"seq": {"$gte": start_seq}}, {"seq": {"$lt": end_seq}}]},
             include=["documents", "metadatas"]
         )
         
-        if not results['ids']:
-            return []
-
-        sorted_results = sorted(zip(results['documents'], results['metadatas']), key=lambda item: item[1]['timestamp'])
+        sorted_results = sorted(zip(results['documents'], results['metadatas']), key=lambda item: item[1]['seq'])
         
         formatted_history = []
         for doc, meta in sorted_results:
             role = meta.get('role', 'USER')
             if role in ["USER", "CHATBOT"]:
                 formatted_history.append({"role": role, "message": doc})
+            elif role == "SUMMARY":
+                formatted_history.append({"role": "SYSTEM", "message": f"Summary of earlier conversation: {doc}"})
             elif role == "TOOL":
                 try:
                     tool_data = json.loads(doc)
@@ -77,29 +269,76 @@ class ChromaDBManager:
                 except json.JSONDecodeError:
                     continue
 
-        return formatted_history[-limit:]
+        return {"history": formatted_history, "next_before_seq": start_seq if start_seq > 0 else None}
 
     def clear_session_history(self, session_id: str):
-        try:
-            self.collection.delete(where={"session_id": session_id})
-            rprint(Panel(f"[yellow]🧹 Cleared history for session:[/yellow] {session_id}", title="ChromaDB Maintenance"))
-        except Exception as e:
-            rprint(Panel(f"[red]❌ Failed to clear history for session {session_id}:[/red] {e}", title="ChromaDB Error"))
+        with self._write_lock:
+            self.flush(session_id)
+            try:
+                self.collection.delete(where={"session_id": session_id})
+                self._invalidate_session(session_id)
+                with self._seq_lock, self._index_conn:
+                    self._next_seq.pop(session_id, None)
+                    self._index_conn.execute("DELETE FROM session_index WHERE session_id = ?", (session_id,))
+                rprint(Panel(f"[yellow]🧹 Cleared history for session:[/yellow] {session_id}", title="ChromaDB Maintenance"))
+            except Exception as e:
+                rprint(Panel(f"[red]❌ Failed to clear history for session {session_id}:[/red] {e}", title="ChromaDB Error"))
+
+    def list_sessions(self) -> List[str]:
+        self.flush()
+        with self._seq_lock:
+            return [row[0] for row in self._index_conn.execute("SELECT session_id FROM session_index")]
+
+    def get_compaction_candidates(self, session_id: str, keep_recent_turns: int) -> dict:
+        self.flush(session_id)
+        cutoff_seq = self._current_next_seq(session_id) - keep_recent_turns
+        results = self.collection.get(where={"session_id": session_id}, include=["documents", "metadatas", "embeddings"])
+        messages = [
+            {"id": doc_id, "content": doc, "metadata": meta, "embedding": embedding}
+            for doc_id, doc, meta, embedding in zip(results["ids"], results["documents"], results["metadatas"], results["embeddings"])
+        ]
+        messages.sort(key=lambda message: message["metadata"]["seq"])
+        return {"cutoff_seq": cutoff_seq, "messages": messages}
+
+    def apply_compaction(self, session_id: str, delete_ids: List[str], summaries: List[tuple]) -> bool:
+        if not delete_ids and not summaries:
+            return True
+        with self._write_lock:
+            if delete_ids and len(self.collection.get(ids=delete_ids, include=[])["ids"]) != len(delete_ids):
+                return False
+            if summaries:
+                documents = [content for content, _ in summaries]
+                self.collection.add(
+                    ids=[str(uuid.uuid4()) for _ in summaries],
+                    embeddings=self.embedding_function(documents),
+                    documents=documents,
+                    metadatas=[metadata for _, metadata in summaries]
+                )
+            if delete_ids:
+                self.collection.delete(ids=delete_ids)
+            self._invalidate_session(session_id)
+        return True
 
     def _add_message(self, session_id: str, role: str, content: str, language: str, speaker_type: str):
+        if self._closed:
+            raise RuntimeError("ChromaDBManager is closed; the message was not stored.")
         doc_id = str(uuid.uuid4())
         timestamp = datetime.utcnow().isoformat()
         
         metadata = {
             "session_id": session_id,
+            "seq": self._allocate_seq(session_id),
             "role": role, 
             "timestamp": timestamp, 
             "language": language,
             "speaker_type": speaker_type
         }
 
-        self.collection.add(
-            ids=[doc_id],
-            documents=[content],
-            metadatas=[metadata]
-        )
\ No newline at end of file
+        self._invalidate_session(session_id)
+        with self._pending_cond:
+            if self._closed:
+                raise RuntimeError("ChromaDBManager is closed; the message was not stored.")
+            self._pending.append((doc_id, content, metadata))
+            self._pending_sessions.add(session_id)
+            if len(self._pending) >= self.batch_size:
+                self._pending_cond.notify()
\ No newline at end of file
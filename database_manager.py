@@ -1,13 +1,26 @@
 import sqlite3
-from datetime import datetime, timedelta, UTC
-from typing import List, Dict, Any, TypedDict, Union
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, UTC
+from typing import List, Dict, Any, Iterable, Optional, Tuple, TypedDict, Union
 from rich import print as rprint
 from rich.panel import Panel
 from rich.console import Console
+from date_resolver import DateResolutionError, resolve_day
 import os
 import json
 import csv
-import dateparser
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
 
 class OrderItem(TypedDict):
@@ -17,24 +30,79 @@ class OrderItem(TypedDict):
 
 
 class DataManager:
-    def __init__(self, db_path: str = "shop_data.db"):
+    def __init__(self, db_path: str = "shop_data.db", busy_timeout: float = 10.0, auto_rollup: bool = True):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
-        self.cursor = self.conn.cursor()
-        self.cursor.execute("PRAGMA foreign_keys = ON;")
-        self._create_tables()
-        rprint(Panel(f"✅ [green]DataManager connected successfully to:[/green] [bold]{self.db_path}[/bold]"))
+        self.busy_timeout = busy_timeout
+        self.auto_rollup = auto_rollup
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode = WAL;")
+        self._migrate()
+        self.customer_search_fts = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'customers_fts'").fetchone() is not None
+        rprint(Panel(f"✅ [green]DataManager connected successfully to:[/green] [bold]{self.db_path}[/bold] (WAL, one connection per thread)"))
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.conn:
-            self.conn.close()
-            rprint(Panel("🔌 [yellow]DataManager connection closed.[/yellow]"))
+        self.close()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON;")
+            conn.execute("PRAGMA synchronous = NORMAL;")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+        if connections:
+            rprint(Panel(f"🔌 [yellow]DataManager closed {len(connections)} connection(s).[/yellow]"))
+
+    def _migrations(self):
+        return [
+            (1, "base tables", self._create_tables),
+            (2, "secondary indexes and orders.order_day", self._add_indexes_and_order_day),
+            (3, "FTS5 customer name search", self._add_customer_search),
+            (4, "rollup high-water marks", self._add_rollup_state),
+            (5, "export watermarks and daily_sales date index", self._add_export_state),
+            (6, "materialised weekly/monthly sales cube", self._add_sales_cube),
+            (7, "daily_sales change log and version-based export watermarks", self._add_sales_change_log),
+        ]
 
-    def _create_tables(self):
+    def _migrate(self):
+        for version, description, apply in self._migrations():
+            with self._transaction() as conn:
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    continue
+                apply(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+            rprint(f"🧱 [cyan]Applied schema migration {version}:[/cyan] {description}")
+
+    def _create_tables(self, conn: sqlite3.Connection):
         sql_commands = [
             "CREATE TABLE IF NOT EXISTS products (product_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE, description TEXT, price REAL NOT NULL, stock_quantity INTEGER NOT NULL DEFAULT 0, date_added TEXT NOT NULL);",
             "CREATE TABLE IF NOT EXISTS customers (customer_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, contact_info TEXT UNIQUE, date_added TEXT NOT NULL);",
@@ -43,45 +111,111 @@ class DataManager:
             "CREATE TABLE IF NOT EXISTS shipments (shipment_id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER NOT NULL UNIQUE, shipping_address TEXT NOT NULL, tracking_number TEXT, shipment_date TEXT, status TEXT NOT NULL DEFAULT 'Awaiting Shipment', FOREIGN KEY (order_id) REFERENCES orders (order_id));",
             "CREATE TABLE IF NOT EXISTS daily_sales (sale_id INTEGER PRIMARY KEY AUTOINCREMENT, product_id INTEGER NOT NULL, sale_date TEXT NOT NULL, quantity_sold INTEGER NOT NULL, total_revenue REAL NOT NULL, UNIQUE(product_id, sale_date), FOREIGN KEY (product_id) REFERENCES products (product_id));"
         ]
-        with self.conn:
-            for command in sql_commands:
-                self.cursor.execute(command)
+        for command in sql_commands:
+            conn.execute(command)
+
+    def _add_indexes_and_order_day(self, conn: sqlite3.Connection):
+        sql_commands = [
+            "ALTER TABLE orders ADD COLUMN order_day TEXT;",
+            "UPDATE orders SET order_day = date(order_date);",
+            "CREATE TRIGGER IF NOT EXISTS orders_set_order_day AFTER INSERT ON orders BEGIN UPDATE orders SET order_day = date(NEW.order_date) WHERE order_id = NEW.order_id; END;",
+            "CREATE TRIGGER IF NOT EXISTS orders_update_order_day AFTER UPDATE OF order_date ON orders BEGIN UPDATE orders SET order_day = date(NEW.order_date) WHERE order_id = NEW.order_id; END;",
+            "CREATE INDEX IF NOT EXISTS idx_orders_customer_date ON orders (customer_id, order_date);",
+            "CREATE INDEX IF NOT EXISTS idx_orders_order_day ON orders (order_day);",
+            "CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id);",
+            "CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items (product_id);"
+        ]
+        for command in sql_commands:
+            conn.execute(command)
+
+    def _add_customer_search(self, conn: sqlite3.Connection):
+        try:
+            conn.execute("CREATE VIRTUAL TABLE customers_fts USING fts5(name, content='customers', content_rowid='customer_id', tokenize='trigram');")
+        except sqlite3.OperationalError as e:
+            rprint(f"[yellow]⚠️ FTS5 trigram search unavailable, customer search will use LIKE:[/yellow] {e}")
+            return
+        sql_commands = [
+            "CREATE TRIGGER customers_fts_insert AFTER INSERT ON customers BEGIN INSERT INTO customers_fts (rowid, name) VALUES (NEW.customer_id, NEW.name); END;",
+            "CREATE TRIGGER customers_fts_delete AFTER DELETE ON customers BEGIN INSERT INTO customers_fts (customers_fts, rowid, name) VALUES ('delete', OLD.customer_id, OLD.name); END;",
+            "CREATE TRIGGER customers_fts_update AFTER UPDATE OF name ON customers BEGIN INSERT INTO customers_fts (customers_fts, rowid, name) VALUES ('delete', OLD.customer_id, OLD.name); INSERT INTO customers_fts (rowid, name) VALUES (NEW.customer_id, NEW.name); END;",
+            "INSERT INTO customers_fts (customers_fts) VALUES ('rebuild');"
+        ]
+        for command in sql_commands:
+            conn.execute(command)
+
+    def _add_rollup_state(self, conn: sqlite3.Connection):
+        conn.execute("CREATE TABLE IF NOT EXISTS rollup_state (name TEXT PRIMARY KEY, high_water_mark INTEGER NOT NULL);")
+        conn.execute("INSERT OR IGNORE INTO rollup_state (name, high_water_mark) VALUES ('daily_sales', 0);")
+
+    def _add_export_state(self, conn: sqlite3.Connection):
+        conn.execute("CREATE TABLE IF NOT EXISTS export_state (target TEXT PRIMARY KEY, last_sale_date TEXT NOT NULL);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_daily_sales_date ON daily_sales (sale_date);")
+
+    def _add_sales_cube(self, conn: sqlite3.Connection):
+        sql_commands = [
+            "CREATE TABLE IF NOT EXISTS product_period_sales (grain TEXT NOT NULL, period_start TEXT NOT NULL, product_id INTEGER NOT NULL, quantity_sold INTEGER NOT NULL, total_revenue REAL NOT NULL, active_days INTEGER NOT NULL, PRIMARY KEY (grain, period_start, product_id), FOREIGN KEY (product_id) REFERENCES products (product_id));",
+            "CREATE TABLE IF NOT EXISTS shop_period_sales (grain TEXT NOT NULL, period_start TEXT NOT NULL, quantity_sold INTEGER NOT NULL, total_revenue REAL NOT NULL, active_days INTEGER NOT NULL, PRIMARY KEY (grain, period_start));"
+        ]
+        for command in sql_commands:
+            conn.execute(command)
+        first_day, last_day = conn.execute("SELECT MIN(sale_date), MAX(sale_date) FROM daily_sales").fetchone()
+        if first_day:
+            self._refresh_sales_cube(conn, first_day, last_day)
+
+    def _add_sales_change_log(self, conn: sqlite3.Connection):
+        log_change = "UPDATE rollup_state SET high_water_mark = high_water_mark + 1 WHERE name = 'daily_sales_version'; INSERT INTO daily_sales_changes (sale_date, product_id, version) SELECT {row}.sale_date, {row}.product_id, high_water_mark FROM rollup_state WHERE name = 'daily_sales_version' ON CONFLICT(sale_date, product_id) DO UPDATE SET version = excluded.version;"
+        sql_commands = [
+            "CREATE TABLE IF NOT EXISTS daily_sales_changes (sale_date TEXT NOT NULL, product_id INTEGER NOT NULL, version INTEGER NOT NULL, PRIMARY KEY (sale_date, product_id));",
+            "CREATE INDEX IF NOT EXISTS idx_daily_sales_changes_version ON daily_sales_changes (version);",
+            "INSERT OR IGNORE INTO rollup_state (name, high_water_mark) VALUES ('daily_sales_version', 0);",
+            f"CREATE TRIGGER daily_sales_log_insert AFTER INSERT ON daily_sales BEGIN {log_change.format(row='NEW')} END;",
+            f"CREATE TRIGGER daily_sales_log_update AFTER UPDATE ON daily_sales WHEN OLD.quantity_sold IS NOT NEW.quantity_sold OR OLD.total_revenue IS NOT NEW.total_revenue BEGIN {log_change.format(row='NEW')} END;",
+            f"CREATE TRIGGER daily_sales_log_delete AFTER DELETE ON daily_sales BEGIN {log_change.format(row='OLD')} END;",
+            "DROP TABLE IF EXISTS export_state;",
+            "CREATE TABLE export_state (target TEXT PRIMARY KEY, last_version INTEGER NOT NULL);"
+        ]
+        for command in sql_commands:
+            conn.execute(command)
 
     def _find_customers(self, identifier: Union[int, str]) -> List[Dict[str, Any]]:
         if isinstance(identifier, int):
-            self.cursor.execute(
+            cursor = self.conn.execute(
                 "SELECT customer_id, name, contact_info FROM customers WHERE customer_id = ?", 
                 (identifier,)
             )
+        elif self.customer_search_fts and len(identifier.strip()) >= 3:
+            cursor = self.conn.execute(
+                "SELECT customer_id, name, contact_info FROM customers WHERE customer_id IN (SELECT rowid FROM customers_fts WHERE customers_fts MATCH ?) OR contact_info = ?", 
+                ('"' + identifier.strip().replace('"', '""') + '"', identifier)
+            )
         else:
-            self.cursor.execute(
+            cursor = self.conn.execute(
                 "SELECT customer_id, name, contact_info FROM customers WHERE lower(name) LIKE ? OR contact_info = ?", 
                 (f"%{identifier.lower()}%", identifier)
             )
-        return [dict(row) for row in self.cursor.fetchall()]
+        return [dict(row) for row in cursor.fetchall()]
 
     def add_product(self, name: str, description: str, price: float, stock_quantity: int) -> int:
-        with self.conn:
-            self.cursor.execute(
+        with self._transaction() as conn:
+            cursor = conn.execute(
                 "INSERT INTO products (name, description, price, stock_quantity, date_added) VALUES (?, ?, ?, ?, ?)", 
                 (name, description, price, stock_quantity, datetime.now(UTC).isoformat())
             )
-            return self.cursor.lastrowid
+            return cursor.lastrowid
 
     def add_customer(self, name: str, contact_info: str) -> int:
-        with self.conn:
-            self.cursor.execute(
+        with self._transaction() as conn:
+            existing = conn.execute(
                 "SELECT customer_id FROM customers WHERE contact_info = ?", 
                 (contact_info,)
-            )
-            existing = self.cursor.fetchone()
+            ).fetchone()
             if existing:
                 return existing['customer_id']
-            self.cursor.execute(
+            cursor = conn.execute(
                 "INSERT INTO customers (name, contact_info, date_added) VALUES (?, ?, ?)", 
                 (name, contact_info, datetime.now(UTC).isoformat())
             )
-            return self.cursor.lastrowid
+            return cursor.lastrowid
 
     def create_order_and_shipment(
         self,
@@ -91,7 +225,7 @@ class DataManager:
         tracking_number: str = None,
         order_date: datetime = None
     ) -> Dict[str, Any]:
-        with self.conn:
+        with self._transaction() as conn:
             customers = self._find_customers(customer_identifier)
             if not customers:
                 return {
@@ -108,37 +242,163 @@ class DataManager:
             total_amount = sum(item['quantity'] * item['price_per_item'] for item in items)
             final_order_date = (order_date or datetime.now(UTC)).isoformat()
 
-            self.cursor.execute(
+            order_id = conn.execute(
                 "INSERT INTO orders (customer_id, order_date, total_amount) VALUES (?, ?, ?)", 
                 (customer_id, final_order_date, total_amount)
-            )
-            order_id = self.cursor.lastrowid
+            ).lastrowid
 
-            self.cursor.executemany(
+            conn.executemany(
                 "INSERT INTO order_items (order_id, product_id, quantity, price_per_item) VALUES (?, ?, ?, ?)", 
                 [(order_id, item['product_id'], item['quantity'], item['price_per_item']) for item in items]
             )
             for item in items:
-                self.cursor.execute(
+                conn.execute(
                     "UPDATE products SET stock_quantity = stock_quantity - ? WHERE product_id = ?", 
                     (item['quantity'], item['product_id'])
                 )
 
-            self.cursor.execute(
+            conn.execute(
                 "INSERT INTO shipments (order_id, shipping_address, tracking_number, shipment_date) VALUES (?, ?, ?, ?)", 
                 (order_id, shipping_address, tracking_number, final_order_date)
             )
+            if self.auto_rollup:
+                self._refresh_pending_daily_sales(conn)
             return {"status": "success", "order_id": order_id, "customer_name": customers[0]['name']}
 
+    def bulk_create_orders(self, orders: Iterable[Dict[str, Any]], batch_size: int = 1000) -> Dict[str, Any]:
+        started = time.perf_counter()
+        received, inserted, errors, batch = 0, 0, [], []
+        for index, order in enumerate(orders):
+            received += 1
+            batch.append((index, order))
+            if len(batch) >= batch_size:
+                inserted += self._ingest_order_batch(batch, errors)
+                batch = []
+        if batch:
+            inserted += self._ingest_order_batch(batch, errors)
+
+        seconds = time.perf_counter() - started
+        rprint(f"📦 [cyan]Bulk ingested {inserted}/{received} order(s) in {seconds:.2f}s.[/cyan]")
+        return {
+            "status": "success" if not errors else "partial_success",
+            "received": received,
+            "inserted": inserted,
+            "failed": len(errors),
+            "errors": errors,
+            "seconds": round(seconds, 3),
+            "orders_per_second": round(inserted / seconds, 1) if seconds > 0 else None
+        }
+
+    def _resolve_customers(self, conn: sqlite3.Connection, identifiers: set) -> Dict[Union[int, str], List[Dict[str, Any]]]:
+        resolved = {identifier: [] for identifier in identifiers}
+        ids = [identifier for identifier in identifiers if isinstance(identifier, int)]
+        contacts = [identifier for identifier in identifiers if isinstance(identifier, str)]
+        for column, values in (("customer_id", ids), ("contact_info", contacts)):
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                rows = conn.execute(f"SELECT customer_id, name, contact_info FROM customers WHERE {column} IN ({','.join('?' * len(chunk))})", chunk)
+                for row in rows:
+                    resolved[row[column]] = [dict(row)]
+        for identifier in contacts:
+            if not resolved[identifier]:
+                resolved[identifier] = self._find_customers(identifier)
+        return resolved
+
+    def _prepare_bulk_order(self, order: Dict[str, Any], customers: Dict, known_products: set) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        try:
+            identifier, items, shipping_address = order['customer_identifier'], order['items'], order['shipping_address']
+            matches = customers.get(identifier) or []
+            if not matches:
+                return None, {"error": "customer_not_found", "message": f"No customer found matching '{identifier}'."}
+            if len(matches) > 1:
+                return None, {"error": "ambiguous_customer", "message": f"Multiple customers match '{identifier}'.", "matches": matches}
+            if not items or not isinstance(shipping_address, str) or not shipping_address.strip():
+                return None, {"error": "invalid_order", "message": "An order needs at least one item and a shipping address string."}
+            tracking_number = order.get('tracking_number')
+            if tracking_number is not None and not isinstance(tracking_number, str):
+                return None, {"error": "invalid_order", "message": "'tracking_number' must be a string."}
+            rows = [(int(item['product_id']), int(item['quantity']), float(item['price_per_item'])) for item in items]
+            unknown = sorted({product_id for product_id, _, _ in rows} - known_products)
+            if unknown:
+                return None, {"error": "product_not_found", "message": f"Unknown product_id(s): {unknown}."}
+            if any(quantity <= 0 for _, quantity, _ in rows):
+                return None, {"error": "invalid_order", "message": "Item quantities must be positive."}
+            order_date = order.get('order_date') or datetime.now(UTC)
+            if isinstance(order_date, str):
+                order_date = datetime.fromisoformat(order_date)
+            if not isinstance(order_date, datetime):
+                return None, {"error": "invalid_order", "message": f"'order_date' must be an ISO date string, got {type(order_date).__name__}."}
+        except (KeyError, TypeError, ValueError) as e:
+            return None, {"error": "invalid_order", "message": f"Malformed order: {e!r}"}
+        return {
+            "customer_id": matches[0]['customer_id'],
+            "order_date": order_date.isoformat(),
+            "total_amount": sum(quantity * price for _, quantity, price in rows),
+            "items": rows,
+            "shipping_address": shipping_address,
+            "tracking_number": tracking_number
+        }, None
+
+    def _ingest_order_batch(self, batch: List[Tuple[int, Dict[str, Any]]], errors: List[Dict[str, Any]]) -> int:
+        identifiers, product_ids = set(), set()
+        for _, order in batch:
+            if isinstance(order, dict):
+                if isinstance(order.get('customer_identifier'), (int, str)):
+                    identifiers.add(order['customer_identifier'])
+                for item in order.get('items') or []:
+                    try:
+                        product_ids.add(int(item['product_id']))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+
+        with self._transaction() as conn:
+            customers = self._resolve_customers(conn, identifiers)
+            known_products, product_list = set(), list(product_ids)
+            for start in range(0, len(product_list), 500):
+                chunk = product_list[start:start + 500]
+                known_products.update(row[0] for row in conn.execute(f"SELECT product_id FROM products WHERE product_id IN ({','.join('?' * len(chunk))})", chunk))
+
+            prepared = []
+            for index, order in batch:
+                row, error = self._prepare_bulk_order(order, customers, known_products) if isinstance(order, dict) else (None, {"error": "invalid_order", "message": "Each order must be an object."})
+                if error:
+                    errors.append({"index": index, **error})
+                else:
+                    prepared.append(row)
+            if not prepared:
+                return 0
+
+            next_order_id = conn.execute(
+                "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'orders'), 0), COALESCE(MAX(order_id), 0)) + 1 FROM orders"
+            ).fetchone()[0]
+            stock_deltas = Counter()
+            order_rows, item_rows, shipment_rows = [], [], []
+            for order_id, row in enumerate(prepared, start=next_order_id):
+                order_rows.append((order_id, row['customer_id'], row['order_date'], row['total_amount']))
+                shipment_rows.append((order_id, row['shipping_address'], row['tracking_number'], row['order_date']))
+                for product_id, quantity, price in row['items']:
+                    item_rows.append((order_id, product_id, quantity, price))
+                    stock_deltas[product_id] += quantity
+
+            conn.executemany("INSERT INTO orders (order_id, customer_id, order_date, total_amount) VALUES (?, ?, ?, ?)", order_rows)
+            conn.executemany("INSERT INTO order_items (order_id, product_id, quantity, price_per_item) VALUES (?, ?, ?, ?)", item_rows)
+            conn.executemany("INSERT INTO shipments (order_id, shipping_address, tracking_number, shipment_date) VALUES (?, ?, ?, ?)", shipment_rows)
+            conn.executemany("UPDATE products SET stock_quantity = stock_quantity - ? WHERE product_id = ?", [(delta, product_id) for product_id, delta in stock_deltas.items()])
+            if self.auto_rollup:
+                self._refresh_pending_daily_sales(conn)
+            return len(prepared)
+
     def get_all_products(self) -> List[Dict[str, Any]]:
-        self.cursor.execute("SELECT * FROM products ORDER BY name")
-        return [dict(row) for row in self.cursor.fetchall()]
+        return [dict(row) for row in self.conn.execute("SELECT * FROM products ORDER BY name").fetchall()]
 
     def get_all_customers(self) -> List[Dict[str, Any]]:
-        self.cursor.execute("SELECT * FROM customers ORDER BY name")
-        return [dict(row) for row in self.cursor.fetchall()]
+        return [dict(row) for row in self.conn.execute("SELECT * FROM customers ORDER BY name").fetchall()]
+
+    MAX_PAGE_SIZE = 100
 
-    def get_customer_details_and_orders(self, customer_identifier: Union[int, str]) -> Dict[str, Any]:
+    def get_customer_details_and_orders(self, customer_identifier: Union[int, str], limit: int = 20, cursor: str = None) -> Dict[str, Any]:
+        if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= self.MAX_PAGE_SIZE:
+            return {"error": "invalid_limit", "message": f"'limit' must be a whole number between 1 and {self.MAX_PAGE_SIZE}, got {limit!r}."}
         customers = self._find_customers(customer_identifier)
         if not customers:
             return {"error": "customer_not_found", "message": f"No customer found matching '{customer_identifier}'."}
@@ -150,93 +410,324 @@ class DataManager:
             }
 
         customer = customers[0]
-        customer_id = customer['customer_id']
-        self.cursor.execute(
-            "SELECT o.*, s.shipping_address, s.tracking_number, s.status AS shipment_status FROM orders o LEFT JOIN shipments s ON o.order_id = s.order_id WHERE o.customer_id = ? ORDER BY o.order_date DESC", 
-            (customer_id,)
-        )
-        orders = [dict(row) for row in self.cursor.fetchall()]
-        for order in orders:
-            self.cursor.execute(
-                "SELECT p.name, oi.quantity, oi.price_per_item FROM order_items oi JOIN products p ON oi.product_id = p.product_id WHERE oi.order_id = ?", 
-                (order['order_id'],)
+        page_filter, params = "o.customer_id = ?", [customer['customer_id']]
+        if cursor:
+            try:
+                before_date, before_id = cursor.rsplit("|", 1)
+                params += [before_date, before_date, int(before_id)]
+            except ValueError:
+                return {"error": "invalid_cursor", "message": f"Cursor '{cursor}' is not a value returned as next_cursor."}
+            page_filter += " AND (o.order_date < ? OR (o.order_date = ? AND o.order_id < ?))"
+        rows = self.conn.execute(
+            f"WITH page AS (SELECT o.*, s.shipping_address, s.tracking_number, s.status AS shipment_status FROM orders o LEFT JOIN shipments s ON o.order_id = s.order_id WHERE {page_filter} ORDER BY o.order_date DESC, o.order_id DESC LIMIT ?) "
+            "SELECT page.*, p.name AS item_name, oi.quantity AS item_quantity, oi.price_per_item AS item_price FROM page LEFT JOIN order_items oi ON oi.order_id = page.order_id LEFT JOIN products p ON oi.product_id = p.product_id ORDER BY page.order_date DESC, page.order_id DESC, oi.order_item_id", 
+            (*params, limit + 1)
+        ).fetchall()
+
+        orders = []
+        for row in rows:
+            if not orders or orders[-1]['order_id'] != row['order_id']:
+                order = {key: row[key] for key in row.keys() if not key.startswith("item_")}
+                order['items'] = []
+                orders.append(order)
+            if row['item_name'] is not None:
+                orders[-1]['items'].append({"name": row['item_name'], "quantity": row['item_quantity'], "price_per_item": row['item_price']})
+
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = f"{orders[-1]['order_date']}|{orders[-1]['order_id']}"
+        return {"status": "success", "customer_details": customer, "orders": orders, "next_cursor": next_cursor}
+
+    def _rollup_daily_sales(self, conn: sqlite3.Connection, day_filter: str, params: tuple) -> int:
+        return conn.execute(
+            "INSERT INTO daily_sales (product_id, sale_date, quantity_sold, total_revenue) "
+            "SELECT oi.product_id, o.order_day, SUM(oi.quantity), SUM(oi.quantity * oi.price_per_item) FROM orders o JOIN order_items oi ON oi.order_id = o.order_id "
+            f"WHERE {day_filter} GROUP BY oi.product_id, o.order_day "
+            "ON CONFLICT(product_id, sale_date) DO UPDATE SET quantity_sold = excluded.quantity_sold, total_revenue = excluded.total_revenue",
+            params
+        ).rowcount
+
+    def _refresh_pending_daily_sales(self, conn: sqlite3.Connection) -> Tuple[int, int]:
+        high_water_mark = conn.execute("SELECT high_water_mark FROM rollup_state WHERE name = 'daily_sales'").fetchone()[0]
+        latest_order_id = conn.execute("SELECT COALESCE(MAX(order_id), 0) FROM orders").fetchone()[0]
+        if latest_order_id <= high_water_mark:
+            return 0, 0
+        days = conn.execute("SELECT COUNT(DISTINCT order_day) FROM orders WHERE order_id > ? AND order_id <= ?", (high_water_mark, latest_order_id)).fetchone()[0]
+        rows = self._rollup_daily_sales(conn, "o.order_day IN (SELECT DISTINCT order_day FROM orders WHERE order_id > ? AND order_id <= ?)", (high_water_mark, latest_order_id))
+        first_day, last_day = conn.execute("SELECT MIN(order_day), MAX(order_day) FROM orders WHERE order_id > ? AND order_id <= ?", (high_water_mark, latest_order_id)).fetchone()
+        self._refresh_sales_cube(conn, first_day, last_day)
+        conn.execute("UPDATE rollup_state SET high_water_mark = ? WHERE name = 'daily_sales'", (latest_order_id,))
+        return rows, days
+
+    PERIOD_EXPRESSIONS = {
+        "day": "sale_date",
+        "week": "date(sale_date, 'weekday 0', '-6 days')",
+        "month": "strftime('%Y-%m-01', sale_date)",
+    }
+
+    @staticmethod
+    def _period_bounds(grain: str, day: str) -> Tuple[str, str]:
+        value = date.fromisoformat(day)
+        if grain == "week":
+            start = value - timedelta(days=value.weekday())
+            return start.isoformat(), (start + timedelta(days=6)).isoformat()
+        if grain == "month":
+            start = value.replace(day=1)
+            return start.isoformat(), ((start + timedelta(days=32)).replace(day=1) - timedelta(days=1)).isoformat()
+        return day, day
+
+    def _refresh_sales_cube(self, conn: sqlite3.Connection, first_day: str, last_day: str):
+        for grain, period in self.PERIOD_EXPRESSIONS.items():
+            start, end = self._period_bounds(grain, first_day)[0], self._period_bounds(grain, last_day)[1]
+            conn.execute("DELETE FROM shop_period_sales WHERE grain = ? AND period_start BETWEEN ? AND ?", (grain, start, end))
+            conn.execute(
+                f"INSERT INTO shop_period_sales (grain, period_start, quantity_sold, total_revenue, active_days) SELECT ?, {period}, SUM(quantity_sold), SUM(total_revenue), COUNT(DISTINCT sale_date) FROM daily_sales WHERE sale_date BETWEEN ? AND ? GROUP BY 2",
+                (grain, start, end)
+            )
+            if grain == "day":
+                continue
+            conn.execute("DELETE FROM product_period_sales WHERE grain = ? AND period_start BETWEEN ? AND ?", (grain, start, end))
+            conn.execute(
+                f"INSERT INTO product_period_sales (grain, period_start, product_id, quantity_sold, total_revenue, active_days) SELECT ?, {period}, product_id, SUM(quantity_sold), SUM(total_revenue), COUNT(*) FROM daily_sales WHERE sale_date BETWEEN ? AND ? GROUP BY 2, product_id",
+                (grain, start, end)
             )
-            order['items'] = [dict(row) for row in self.cursor.fetchall()]
-
-        return {"status": "success", "customer_details": customer, "orders": orders}
 
-    def update_daily_sales(self, for_date: datetime = None):
-        target_date = (for_date or datetime.now(UTC)).strftime('%Y-%m-%d')
-        rprint(f"📈 [cyan]Updating daily sales summary for date:[/cyan] {target_date}")
-        with self.conn:
-            self.cursor.execute(
-                "SELECT oi.product_id, date(o.order_date) as sale_date, SUM(oi.quantity) as total_quantity, SUM(oi.quantity * oi.price_per_item) as total_revenue FROM order_items oi JOIN orders o ON oi.order_id = o.order_id WHERE sale_date = ? GROUP BY oi.product_id, sale_date", 
-                (target_date,)
+    def _rollup_query(self, grain: str, start_date, end_date, product_name: str, by_product: bool) -> Tuple[str, list]:
+        if grain not in self.PERIOD_EXPRESSIONS:
+            raise ValueError(f"Unknown grain '{grain}'. Expected one of {list(self.PERIOD_EXPRESSIONS)}.")
+        if not (product_name or by_product):
+            source, period_column, columns = "shop_period_sales r", "r.period_start", "r.period_start, r.quantity_sold, r.total_revenue, r.active_days"
+        elif grain == "day":
+            source, period_column, columns = "daily_sales r JOIN products p ON r.product_id = p.product_id", "r.sale_date", "r.sale_date AS period_start, r.quantity_sold, r.total_revenue, 1 AS active_days, p.name AS product_name"
+        else:
+            source, period_column, columns = "product_period_sales r JOIN products p ON r.product_id = p.product_id", "r.period_start", "r.period_start, r.quantity_sold, r.total_revenue, r.active_days, p.name AS product_name"
+
+        conditions, params = [], []
+        if grain != "day" or source.startswith("shop"):
+            conditions.append("r.grain = ?")
+            params.append(grain)
+        if start_date:
+            conditions.append(f"{period_column} >= ?")
+            params.append(self._period_bounds(grain, resolve_day(start_date))[0])
+        if end_date:
+            conditions.append(f"{period_column} <= ?")
+            params.append(self._period_bounds(grain, resolve_day(end_date, prefer='future'))[0])
+        if product_name:
+            conditions.append("LOWER(p.name) = LOWER(?)")
+            params.append(product_name)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f"SELECT {columns} FROM {source} {where_clause}", params
+
+    def get_sales_rollup(self, grain: str = "month", start_date: Union[datetime, str] = None, end_date: Union[datetime, str] = None, product_name: str = None, by_product: bool = False) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        try:
+            query, params = self._rollup_query(grain, start_date, end_date, product_name, by_product)
+        except DateResolutionError as e:
+            return e.to_dict()
+        except ValueError as e:
+            return {"error": "invalid_grain", "message": str(e)}
+        order_by = "period_start, total_revenue DESC" if product_name or by_product else "period_start"
+        return [dict(row) for row in self.conn.execute(f"{query} ORDER BY {order_by}", params).fetchall()]
+
+    def get_best_sales_period(self, grain: str = "day", start_date: Union[datetime, str] = None, end_date: Union[datetime, str] = None, product_name: str = None, metric: str = "total_revenue") -> Dict[str, Any]:
+        if metric not in ("total_revenue", "quantity_sold"):
+            return {"error": "invalid_metric", "message": "Metric must be 'total_revenue' or 'quantity_sold'."}
+        try:
+            query, params = self._rollup_query(grain, start_date, end_date, product_name, False)
+        except DateResolutionError as e:
+            return e.to_dict()
+        except ValueError as e:
+            return {"error": "invalid_grain", "message": str(e)}
+        result = self.conn.execute(f"{query} ORDER BY {metric} DESC, period_start LIMIT 1", params).fetchone()
+        return {"status": "success", "grain": grain, "best_period": dict(result)} if result else {"status": "success", "grain": grain, "best_period": None}
+
+    def update_daily_sales(self, for_date: Union[datetime, str] = None, end_date: Union[datetime, str] = None) -> Dict[str, Any]:
+        with self._transaction() as conn:
+            if for_date is None and end_date is None:
+                rows, days = self._refresh_pending_daily_sales(conn)
+                rprint(f"📈 [cyan]Refreshed daily sales for {days} day(s) touched by new orders.[/cyan]")
+                return {"status": "success", "days_refreshed": days, "rows_written": rows}
+
+            try:
+                start_day, end_day = resolve_day(for_date or end_date), resolve_day(end_date or for_date)
+            except DateResolutionError as e:
+                return e.to_dict()
+            rprint(f"📈 [cyan]Rebuilding daily sales summary for:[/cyan] {start_day} → {end_day}")
+            rows = self._rollup_daily_sales(conn, "o.order_day BETWEEN ? AND ?", (start_day, end_day))
+            conn.execute(
+                "DELETE FROM daily_sales WHERE sale_date BETWEEN ? AND ? AND NOT EXISTS (SELECT 1 FROM orders o JOIN order_items oi ON oi.order_id = o.order_id WHERE o.order_day = daily_sales.sale_date AND oi.product_id = daily_sales.product_id)",
+                (start_day, end_day)
+            )
+            self._refresh_sales_cube(conn, start_day, end_day)
+            if not rows:
+                rprint(f"[yellow]No sales recorded between {start_day} and {end_day}.[/yellow]")
+            else:
+                rprint(f"[green]✅ Daily sales updated ({rows} product-day row(s)).[/green]")
+            return {"status": "success", "start_date": start_day, "end_date": end_day, "rows_written": rows}
+
+    SALES_EXPORT_COLUMNS = ['date', 'product_name', 'quantity_sold', 'daily_revenue']
+
+    def _iter_sales_rows(self, since_version: int = None, up_to_version: int = None, chunk_size: int = 5000):
+        if since_version is None:
+            cursor = self.conn.execute(
+                "SELECT ds.sale_date, p.name as product_name, ds.quantity_sold, ds.total_revenue FROM daily_sales ds JOIN products p ON ds.product_id = p.product_id ORDER BY ds.sale_date, p.name"
+            )
+        else:
+            cursor = self.conn.execute(
+                "SELECT c.sale_date, p.name as product_name, COALESCE(ds.quantity_sold, 0) AS quantity_sold, COALESCE(ds.total_revenue, 0.0) AS total_revenue "
+                "FROM daily_sales_changes c JOIN products p ON c.product_id = p.product_id LEFT JOIN daily_sales ds ON ds.sale_date = c.sale_date AND ds.product_id = c.product_id "
+                "WHERE c.version > ? AND c.version <= ? ORDER BY c.sale_date, p.name",
+                (since_version, up_to_version)
+            )
+        while rows := cursor.fetchmany(chunk_size):
+            yield rows
+
+    def _export_window(self, target: str, incremental: bool, resume: bool) -> Tuple[Optional[int], Optional[int]]:
+        if not incremental:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM export_state WHERE target = ?", (target,))
+            return None, None
+        current_version = self.conn.execute("SELECT high_water_mark FROM rollup_state WHERE name = 'daily_sales_version'").fetchone()[0]
+        row = self.conn.execute("SELECT last_version FROM export_state WHERE target = ?", (target,)).fetchone()
+        return (row['last_version'] if row and resume else None), current_version
+
+    def _set_export_watermark(self, target: str, last_version: int):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO export_state (target, last_version) VALUES (?, ?) ON CONFLICT(target) DO UPDATE SET last_version = excluded.last_version",
+                (target, last_version)
             )
-            sales_for_day = self.cursor.fetchall()
-            if not sales_for_day:
-                rprint(f"[yellow]No sales recorded for {target_date}.[/yellow]")
-                return
-            for sale in sales_for_day:
-                self.cursor.execute(
-                    "INSERT INTO daily_sales (product_id, sale_date, quantity_sold, total_revenue) VALUES (?, ?, ?, ?) ON CONFLICT(product_id, sale_date) DO UPDATE SET quantity_sold = excluded.quantity_sold, total_revenue = excluded.total_revenue;", 
-                    (sale['product_id'], sale['sale_date'], sale['total_quantity'], sale['total_revenue'])
-                )
-            rprint(f"[green]✅ Daily sales updated for {len(sales_for_day)} product(s).[/green]")
 
-    def export_sales_to_csv(self, file_path: str) -> str:
-        self.cursor.execute(
-            "SELECT ds.sale_date, p.name as product_name, ds.quantity_sold, ds.total_revenue FROM daily_sales ds JOIN products p ON ds.product_id = p.product_id ORDER BY ds.sale_date, p.name"
-        )
-        sales_data = self.cursor.fetchall()
-        with open(file_path, 'w', newline='') as f:
+    def export_sales_to_csv(self, file_path: str, incremental: bool = False, chunk_size: int = 5000) -> str:
+        target = os.path.abspath(file_path)
+        since_version, current_version = self._export_window(target, incremental, resume=os.path.exists(file_path))
+        appending, rows_written = since_version is not None, 0
+        with open(file_path, 'a' if appending else 'w', newline='') as f:
             writer = csv.writer(f)
-            writer.writerow(['date', 'product_name', 'quantity_sold', 'daily_revenue'])
-            for row in sales_data:
-                writer.writerow([row['sale_date'], row['product_name'], row['quantity_sold'], row['total_revenue']])
-        return f"Successfully exported detailed sales data to {file_path}"
-
-    def get_sales_on_date(self, date_str: str) -> List[Dict[str, Any]]:
-        target_date = dateparser.parse(date_str, settings={'PREFER_DATES_FROM': 'past'}).strftime('%Y-%m-%d')
-        self.cursor.execute(
+            if not appending:
+                writer.writerow(self.SALES_EXPORT_COLUMNS)
+            for rows in self._iter_sales_rows(since_version, current_version, chunk_size):
+                writer.writerows((row['sale_date'], row['product_name'], row['quantity_sold'], row['total_revenue']) for row in rows)
+                rows_written += len(rows)
+        if incremental:
+            self._set_export_watermark(target, current_version)
+        mode = f"appended {rows_written} changed" if appending else f"exported {rows_written}"
+        return f"Successfully {mode} detailed sales row(s) to {file_path}"
+
+    def export_sales_to_parquet(self, file_path: str, incremental: bool = False, chunk_size: int = 50000) -> Union[str, Dict[str, Any]]:
+        if not PYARROW_AVAILABLE:
+            return {"error": "parquet_unavailable", "message": "Parquet export needs `pip install pyarrow`."}
+        schema = pa.schema([("date", pa.date32()), ("product_name", pa.string()), ("quantity_sold", pa.int64()), ("daily_revenue", pa.float64())])
+        target = os.path.abspath(file_path)
+        if incremental:
+            os.makedirs(file_path, exist_ok=True)
+        since_version, current_version = self._export_window(target, incremental, resume=incremental and any(name.endswith(".parquet") for name in os.listdir(file_path)))
+        output_path = os.path.join(file_path, f"part-{datetime.now(UTC).strftime('%Y%m%dT%H%M%S%f')}.parquet") if incremental else file_path
+
+        rows_written, writer = 0, None
+        try:
+            for rows in self._iter_sales_rows(since_version, current_version, chunk_size):
+                batch = pa.record_batch([
+                    pa.array([row['sale_date'] for row in rows]).cast(pa.date32()),
+                    pa.array([row['product_name'] for row in rows], pa.string()),
+                    pa.array([row['quantity_sold'] for row in rows], pa.int64()),
+                    pa.array([row['total_revenue'] for row in rows], pa.float64())
+                ], schema=schema)
+                writer = writer or pq.ParquetWriter(output_path, schema)
+                writer.write_batch(batch)
+                rows_written += len(rows)
+            if writer is None and not incremental:
+                pq.write_table(schema.empty_table(), output_path)
+        finally:
+            if writer:
+                writer.close()
+        if incremental:
+            self._set_export_watermark(target, current_version)
+        if incremental and not rows_written:
+            return f"No changed sales rows to export to {file_path}"
+        return f"Successfully exported {rows_written} detailed sales row(s) to {output_path}"
+
+    def get_daily_sales_frame(self, product_name: str = None, start_date: Union[datetime, str] = None, end_date: Union[datetime, str] = None, fill_missing_days: bool = True) -> pd.DataFrame:
+        conditions, params = [], []
+        if product_name:
+            conditions.append("ds.product_id IN (SELECT product_id FROM products WHERE LOWER(name) = LOWER(?))")
+            params.append(product_name)
+        if start_date:
+            conditions.append("ds.sale_date >= ?")
+            params.append(resolve_day(start_date))
+        if end_date:
+            conditions.append("ds.sale_date <= ?")
+            params.append(resolve_day(end_date))
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.conn.execute(
+            f"SELECT ds.sale_date, SUM(ds.quantity_sold), SUM(ds.total_revenue) FROM daily_sales ds {where_clause} GROUP BY ds.sale_date ORDER BY ds.sale_date",
+            params
+        ).fetchall()
+        frame = pd.DataFrame(
+            {
+                "quantity_sold": np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows)),
+                "daily_revenue": np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+            },
+            index=pd.DatetimeIndex(np.array([row[0] for row in rows], dtype="datetime64[D]"), name="date")
+        )
+        return frame.asfreq("D", fill_value=0) if fill_missing_days and len(frame) else frame
+
+    def get_sales_on_date(self, date_str: str) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        try:
+            target_date = resolve_day(date_str)
+        except DateResolutionError as e:
+            return e.to_dict()
+        cursor = self.conn.execute(
             "SELECT p.name as product_name, ds.quantity_sold, ds.total_revenue FROM daily_sales ds JOIN products p ON ds.product_id = p.product_id WHERE ds.sale_date = ?", 
             (target_date,)
         )
-        return [dict(row) for row in self.cursor.fetchall()]
+        return [dict(row) for row in cursor.fetchall()]
 
     def get_product_sales_on_date(self, product_name: str, date_str: str) -> Dict[str, Any]:
-        target_date = dateparser.parse(date_str, settings={'PREFER_DATES_FROM': 'past'}).strftime('%Y-%m-%d')
-        self.cursor.execute(
+        try:
+            target_date = resolve_day(date_str)
+        except DateResolutionError as e:
+            return e.to_dict()
+        cursor = self.conn.execute(
             "SELECT p.name as product_name, ds.quantity_sold, ds.total_revenue FROM daily_sales ds JOIN products p ON ds.product_id = p.product_id WHERE ds.sale_date = ? AND LOWER(p.name) = LOWER(?)", 
             (target_date, product_name)
         )
-        result = self.cursor.fetchone()
+        result = cursor.fetchone()
         return dict(result) if result else None
 
-    def get_sales_for_date_range(self, start_date_str: str, end_date_str: str) -> List[Dict[str, Any]]:
-        start_date = dateparser.parse(start_date_str, settings={'PREFER_DATES_FROM': 'past'}).strftime('%Y-%m-%d')
-        end_date = dateparser.parse(end_date_str, settings={'PREFER_DATES_FROM': 'future'}).strftime('%Y-%m-%d')
-        self.cursor.execute(
+    def get_sales_for_date_range(self, start_date_str: str, end_date_str: str) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        try:
+            start_date = resolve_day(start_date_str, prefer='past')
+            end_date = resolve_day(end_date_str, prefer='future')
+        except DateResolutionError as e:
+            return e.to_dict()
+        cursor = self.conn.execute(
             "SELECT sale_date, product_id, quantity_sold, total_revenue FROM daily_sales WHERE sale_date BETWEEN ? AND ? ORDER BY sale_date", 
             (start_date, end_date)
         )
-        return [dict(row) for row in self.cursor.fetchall()]
-
-    def get_customers_on_date(self, date_str: str) -> List[Dict[str, Any]]:
-        target_date = dateparser.parse(date_str, settings={'PREFER_DATES_FROM': 'past'}).strftime('%Y-%m-%d')
-        self.cursor.execute(
-            "SELECT DISTINCT c.customer_id, c.name, c.contact_info FROM customers c JOIN orders o ON c.customer_id = o.customer_id WHERE date(o.order_date) = ?", 
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get_customers_on_date(self, date_str: str) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        try:
+            target_date = resolve_day(date_str)
+        except DateResolutionError as e:
+            return e.to_dict()
+        cursor = self.conn.execute(
+            "SELECT DISTINCT c.customer_id, c.name, c.contact_info FROM customers c JOIN orders o ON c.customer_id = o.customer_id WHERE o.order_day = ?", 
             (target_date,)
         )
-        return [dict(row) for row in self.cursor.fetchall()]
+        return [dict(row) for row in cursor.fetchall()]
 
     def get_total_sales_summary_on_date(self, date_str: str) -> Dict[str, Any]:
-        target_date = dateparser.parse(date_str, settings={'PREFER_DATES_FROM': 'past'}).strftime('%Y-%m-%d')
-        self.cursor.execute(
+        try:
+            target_date = resolve_day(date_str)
+        except DateResolutionError as e:
+            return e.to_dict()
+        cursor = self.conn.execute(
             "SELECT SUM(total_revenue) as grand_total_revenue, SUM(quantity_sold) as total_items_sold FROM daily_sales WHERE sale_date = ?", 
             (target_date,)
         )
-        result = self.cursor.fetchone()
+        result = cursor.fetchone()
         return dict(result) if result and result['grand_total_revenue'] is not None else {"grand_total_revenue": 0, "total_items_sold": 0}
 
 
@@ -277,4 +768,75 @@ if __name__ == '__main__':
         alice_orders = db.get_customer_details_and_orders("Alice")
         console.print(Panel(json.dumps(alice_orders, indent=2), title=f"📄 Alice's Full Order History (by name)"))
 
+        console.rule("[bold]Step 5: Order History Pagination[/bold]")
+        for days_ago in range(2, 7):
+            db.create_order_and_shipment(c1_id, [{"product_id": p2_id, "quantity": 1, "price_per_item": 24.99}], "Addr 1", order_date=datetime.now(UTC) - timedelta(days=days_ago))
+        seen, cursor = [], None
+        while True:
+            page = db.get_customer_details_and_orders(c1_id, limit=2, cursor=cursor)
+            assert len(page["orders"]) <= 2, page
+            seen += [order["order_id"] for order in page["orders"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == len(set(seen)) == 6, seen
+        assert db.get_customer_details_and_orders(c1_id, limit=6)["next_cursor"] is None
+        for bad_limit in (0, -1, DataManager.MAX_PAGE_SIZE + 1, "10"):
+            assert db.get_customer_details_and_orders(c1_id, limit=bad_limit)["error"] == "invalid_limit", bad_limit
+        assert db.get_customer_details_and_orders(c1_id, cursor="not-a-cursor")["error"] == "invalid_cursor"
+        console.print(f"✅ Paged through {len(seen)} orders two at a time; invalid limits and cursors are rejected.")
+
+        console.rule("[bold]Step 6: Daily Sales Rollup After Bulk Ingest[/bold]")
+        bulk_orders = [
+            {"customer_identifier": [c1_id, c2_id][n % 2], "items": [{"product_id": [p1_id, p2_id][n % 3 % 2], "quantity": 1 + n % 4, "price_per_item": 10.0 + n % 5}],
+             "shipping_address": "Addr 3", "order_date": (datetime.now(UTC) - timedelta(days=10 + n % 20)).isoformat()}
+            for n in range(300)
+        ]
+        assert db.bulk_create_orders(bulk_orders)["inserted"] == 300
+        bad_rows = [{**bulk_orders[0], "order_date": 1717000000}, {**bulk_orders[0], "shipping_address": {"city": "Pune"}}, {**bulk_orders[0], "tracking_number": 42}]
+        mixed = db.bulk_create_orders([bulk_orders[0], *bad_rows, bulk_orders[1]])
+        assert mixed["inserted"] == 2 and [error["index"] for error in mixed["errors"]] == [1, 2, 3], mixed
+        expected_daily = "SELECT oi.product_id, o.order_day, SUM(oi.quantity), ROUND(SUM(oi.quantity * oi.price_per_item), 6) FROM orders o JOIN order_items oi ON oi.order_id = o.order_id GROUP BY 1, 2 ORDER BY 1, 2"
+        stored_daily = "SELECT product_id, sale_date, quantity_sold, ROUND(total_revenue, 6) FROM daily_sales ORDER BY 1, 2"
+        assert list(map(tuple, db.conn.execute(expected_daily))) == list(map(tuple, db.conn.execute(stored_daily)))
+        rebuilt_day = (datetime.now(UTC) - timedelta(days=12)).date().isoformat()
+        with db._transaction() as conn:
+            conn.execute("DELETE FROM order_items WHERE order_id IN (SELECT order_id FROM orders WHERE order_day = ?)", (rebuilt_day,))
+        db.update_daily_sales(for_date=rebuilt_day, end_date=rebuilt_day)
+        assert db.conn.execute("SELECT COUNT(*) FROM daily_sales WHERE sale_date = ?", (rebuilt_day,)).fetchone()[0] == 0
+        assert list(map(tuple, db.conn.execute(expected_daily))) == list(map(tuple, db.conn.execute(stored_daily)))
+        console.print("✅ daily_sales matches a full aggregation after a bulk ingest and a single-day rebuild.")
+
+        console.rule("[bold]Step 7: Sales Cube After Bulk Ingest[/bold]")
+        for grain, period in DataManager.PERIOD_EXPRESSIONS.items():
+            expected_shop = f"SELECT {period}, SUM(quantity_sold), ROUND(SUM(total_revenue), 6), COUNT(DISTINCT sale_date) FROM daily_sales GROUP BY 1 ORDER BY 1"
+            stored_shop = "SELECT period_start, quantity_sold, ROUND(total_revenue, 6), active_days FROM shop_period_sales WHERE grain = ? ORDER BY 1"
+            assert list(map(tuple, db.conn.execute(expected_shop))) == list(map(tuple, db.conn.execute(stored_shop, (grain,)))), grain
+            if grain == "day":
+                continue
+            expected_product = f"SELECT {period}, product_id, SUM(quantity_sold), ROUND(SUM(total_revenue), 6) FROM daily_sales GROUP BY 1, 2 ORDER BY 1, 2"
+            stored_product = "SELECT period_start, product_id, quantity_sold, ROUND(total_revenue, 6) FROM product_period_sales WHERE grain = ? ORDER BY 1, 2"
+            assert list(map(tuple, db.conn.execute(expected_product))) == list(map(tuple, db.conn.execute(stored_product, (grain,)))), grain
+        best_week = db.get_best_sales_period(grain="week")["best_period"]
+        top_week = db.conn.execute(f"SELECT {DataManager.PERIOD_EXPRESSIONS['week']}, SUM(total_revenue) AS revenue FROM daily_sales GROUP BY 1 ORDER BY revenue DESC, 1 LIMIT 1").fetchone()
+        assert best_week["period_start"] == top_week[0], (best_week, tuple(top_week))
+        console.print(Panel(json.dumps(db.get_sales_rollup(grain="month"), indent=2), title="📊 Monthly Sales Rollup"))
+        console.print("✅ Weekly and monthly cube rows match daily_sales after the bulk ingest and the range rebuild.")
+
+        console.rule("[bold]Step 8: Incremental Export Re-emits Changed Days[/bold]")
+        export_file = "test_sales_export.csv"
+        if os.path.exists(export_file):
+            os.remove(export_file)
+        db.export_sales_to_csv(export_file, incremental=True)
+        assert "appended 0 changed" in db.export_sales_to_csv(export_file, incremental=True)
+        backdated_day = (datetime.now(UTC) - timedelta(days=40)).date().isoformat()
+        db.create_order_and_shipment(c1_id, [{"product_id": p1_id, "quantity": 3, "price_per_item": 49.99}], "Addr 4", order_date=datetime.now(UTC) - timedelta(days=40))
+        assert "appended 1 changed" in db.export_sales_to_csv(export_file, incremental=True)
+        with open(export_file, newline='') as f:
+            exported = {(row['date'], row['product_name']): row for row in csv.DictReader(f)}
+        stored = db.conn.execute("SELECT ds.sale_date, p.name, ds.quantity_sold FROM daily_sales ds JOIN products p ON ds.product_id = p.product_id").fetchall()
+        assert {(row[0], row[1]): str(row[2]) for row in stored} == {key: row['quantity_sold'] for key, row in exported.items() if row['quantity_sold'] != '0'}
+        os.remove(export_file)
+        console.print("✅ A back-dated order is re-exported, and upserting the export by date and product matches daily_sales.")
+
     console.print(Panel("🏁 [bold green]DataManager Test Suite Finished Successfully[/bold green] 🏁"))
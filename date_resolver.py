@@ -0,0 +1,84 @@
+import re
+from datetime import date, datetime, timedelta, UTC
+from functools import lru_cache
+from typing import Any, Dict, Union
+
+
+class DateResolutionError(ValueError):
+    def __init__(self, phrase: str, message: str = None):
+        self.phrase = phrase
+        super().__init__(message or f"Could not understand the date '{phrase}'. Try a date like 2024-05-31 or a phrase like 'yesterday' or '3 days ago'.")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"error": "invalid_date", "message": str(self), "date": self.phrase}
+
+
+FIXED_OFFSETS = {
+    "today": 0, "now": 0, "tonight": 0, "this morning": 0,
+    "yesterday": -1, "day before yesterday": -2, "the day before yesterday": -2,
+    "tomorrow": 1, "day after tomorrow": 2, "the day after tomorrow": 2,
+    "last week": -7, "a week ago": -7, "one week ago": -7,
+}
+UNIT_DAYS = {"day": 1, "week": 7}
+RELATIVE_PATTERN = re.compile(r"^(?:(?P<past_n>\d+|a|an|one) (?P<past_unit>day|week)s? ago|in (?P<future_n>\d+|a|an|one) (?P<future_unit>day|week)s?)$")
+
+
+def _count(value: str) -> int:
+    return 1 if value in ("a", "an", "one") else int(value)
+
+
+def _months_back(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 - months
+    year, month = divmod(month_index, 12)
+    next_month = date(year + (month + 1) // 12, (month + 1) % 12 + 1, 1)
+    return date(year, month + 1, min(day.day, (next_month - timedelta(days=1)).day))
+
+
+def _utc_day(moment: datetime) -> date:
+    return moment.astimezone(UTC).date() if moment.tzinfo else moment.date()
+
+
+@lru_cache(maxsize=2048)
+def _resolve(phrase: str, prefer: str, today_iso: str) -> str:
+    today = date.fromisoformat(today_iso)
+    try:
+        return (_utc_day(datetime.fromisoformat(phrase.upper())) if len(phrase) > 10 else date.fromisoformat(phrase)).isoformat()
+    except ValueError:
+        pass
+
+    if phrase in FIXED_OFFSETS:
+        return (today + timedelta(days=FIXED_OFFSETS[phrase])).isoformat()
+    if phrase == "last month":
+        return _months_back(today, 1).isoformat()
+    match = RELATIVE_PATTERN.match(phrase)
+    if match:
+        if match["past_n"]:
+            return (today - timedelta(days=_count(match["past_n"]) * UNIT_DAYS[match["past_unit"]])).isoformat()
+        return (today + timedelta(days=_count(match["future_n"]) * UNIT_DAYS[match["future_unit"]])).isoformat()
+
+    import dateparser
+    parsed = dateparser.parse(phrase, settings={
+        'PREFER_DATES_FROM': prefer,
+        'RELATIVE_BASE': datetime.combine(today, datetime.now(UTC).time())
+    })
+    if parsed is None:
+        raise DateResolutionError(phrase)
+    return _utc_day(parsed).isoformat()
+
+
+def resolve_day(value: Union[str, date, datetime], prefer: str = "past") -> str:
+    if isinstance(value, datetime):
+        return _utc_day(value).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if not isinstance(value, str) or not value.strip():
+        raise DateResolutionError(str(value), "A date is required, e.g. 2024-05-31, 'today' or 'yesterday'.")
+    phrase = " ".join(value.strip().lower().split())
+    try:
+        return _resolve(phrase, prefer, datetime.now(UTC).date().isoformat())
+    except DateResolutionError:
+        raise DateResolutionError(value)
+
+
+def cache_info():
+    return _resolve.cache_info()
@@ -0,0 +1,157 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from rich import print as rprint
+from rich.panel import Panel
+import config
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def _load_default_model(model_name: str) -> Callable[[List[str]], List[List[float]]]:
+    from chromadb.utils import embedding_functions
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+def _load_sentence_transformer(model_name: str) -> Callable[[List[str]], List[List[float]]]:
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        raise ImportError("The 'sentence-transformers' provider needs `pip install sentence-transformers`.")
+    model = SentenceTransformer(model_name, device="cpu")
+    return lambda texts: model.encode(texts, batch_size=len(texts), normalize_embeddings=True, show_progress_bar=False)
+
+
+PROVIDERS = {
+    "default": _load_default_model,
+    "sentence-transformers": _load_sentence_transformer,
+}
+
+
+class CachedEmbeddingFunction:
+    def __init__(self, provider: str = "default", model_name: str = DEFAULT_MODEL_NAME, cache_path: str = "embedding_cache.db",
+                 batch_size: int = 64, max_workers: int = 4, memory_cache_size: int = 4096):
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown embedding provider '{provider}'. Expected one of {list(PROVIDERS)}.")
+        if provider == "default" and model_name != DEFAULT_MODEL_NAME:
+            raise ValueError(f"The 'default' provider only serves {DEFAULT_MODEL_NAME}, got '{model_name}'. Use provider='sentence-transformers' for other models.")
+        self.provider = provider
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.memory_cache_size = memory_cache_size
+        self.hits = 0
+        self.misses = 0
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._memory_cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.provider}:{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _encode(self, texts: List[str]) -> List[np.ndarray]:
+        with self._model_lock:
+            if self._model is None:
+                self._model = PROVIDERS[self.provider](self.model_name)
+        return [np.asarray(vector, dtype=np.float32) for vector in self._model(texts)]
+
+    def _lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory_cache:
+                    self._memory_cache.move_to_end(key)
+                    found[key] = self._memory_cache[key]
+            missing = [key for key in keys if key not in found]
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                rows = self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, found[key])
+        return found
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory_cache[key] = vector
+        self._memory_cache.move_to_end(key)
+        while len(self._memory_cache) > self.memory_cache_size:
+            self._memory_cache.popitem(last=False)
+
+    def _store(self, vectors: Dict[str, np.ndarray]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in vectors.items()]
+            )
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+
+    def _embed(self, texts: List[str], parallel: bool) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        vectors = self._lookup(list(dict.fromkeys(keys)))
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in vectors))
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            batches = [missing[start:start + self.batch_size] for start in range(0, len(missing), self.batch_size)]
+            if parallel and len(batches) > 1:
+                with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="kala-embed") as executor:
+                    encoded = list(executor.map(self._encode, batches))
+            else:
+                encoded = [self._encode(batch) for batch in batches]
+            computed = {self._key(text): vector for batch, batch_vectors in zip(batches, encoded) for text, vector in zip(batch, batch_vectors)}
+            self._store(computed)
+            vectors.update(computed)
+        return [vectors[key].tolist() for key in keys]
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), parallel=False)
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), parallel=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {"provider": self.provider, "model": self.model_name, "hits": hits, "misses": misses,
+                "hit_rate": round(hits / total, 3) if total else 0.0}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_shared_functions: Dict[tuple, CachedEmbeddingFunction] = {}
+_shared_lock = threading.Lock()
+
+
+def get_embedding_function(provider: Optional[str] = None, model_name: Optional[str] = None) -> CachedEmbeddingFunction:
+    provider = provider or getattr(config, "EMBEDDING_PROVIDER", "default")
+    model_name = model_name or getattr(config, "EMBEDDING_MODEL", DEFAULT_MODEL_NAME)
+    with _shared_lock:
+        if (provider, model_name) not in _shared_functions:
+            _shared_functions[(provider, model_name)] = CachedEmbeddingFunction(
+                provider=provider,
+                model_name=model_name,
+                cache_path=getattr(config, "EMBEDDING_CACHE_PATH", "embedding_cache.db"),
+                batch_size=getattr(config, "EMBEDDING_BATCH_SIZE", 64),
+                max_workers=getattr(config, "EMBEDDING_WORKERS", 4)
+            )
+            rprint(Panel.fit(f"[green]✅ Embedding provider ready:[/green] {provider} / {model_name}"))
+        return _shared_functions[(provider, model_name)]
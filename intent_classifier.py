@@ -1,21 +1,273 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel
-from typing import Literal
+from typing import Literal, Optional, Tuple
+from collections import Counter, OrderedDict
 import os
+import re
+import json
+import time
+import pickle
+import sqlite3
+import threading
+import unicodedata
+from rich import print as rprint
+from rich.panel import Panel
+from rich.table import Table
+from rich.console import Console
+
+from tool_definations import get_tool_definitions
+
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+CLASSIFIER_VERSION = 2
 
 class IntentResponse(BaseModel):
     intent: Literal["tool_use", "general_conversation"]
 
+ACTION_VERBS = {
+    "add", "analyse", "analyze", "build", "calculate", "change", "check", "create", "delete", "deploy", "design",
+    "draft", "enhance", "export", "find", "forecast", "generate", "list", "make", "monitor", "open", "post",
+    "publish", "record", "remove", "research", "scan", "schedule", "search", "send", "share", "show", "update",
+    "upload", "write"
+}
+STRONG_ACTION_VERBS = {"post", "send", "publish", "upload", "export", "forecast", "schedule", "deploy"}
+GENERIC_TOOL_TOKENS = {
+    "and", "or", "with", "api", "on", "for", "all", "to", "in", "of", "by", "text", "file", "full", "date", "range",
+    "new", "current", "details", "system", "data", "manager", "total", "summary", "get", "bizintel", "predictive",
+    "from", "best", "period", "bulk", "suggest", "structure", "clear", "content", "message", "page", "feed",
+    "feedback", "database", "daily", "rollup", "market", "promotional"
+}
+DOMAIN_NOUNS = {"revenue", "stock", "sale", "order", "invoice", "inventory", "customer", "product", "price", "report", "comment", "listing"}
+QUESTION_WORDS = {"what", "whats", "which", "who", "whom", "whose", "when", "where", "why", "how", "much", "many"}
+REQUEST_VERBS = {"can", "could", "would", "will", "please", "tell", "give", "need", "want", "let", "help", "do", "does", "did", "is", "are"}
+CONVERSATION_PHRASES = (
+    r"(?:hi|hello|hey|hiya|namaste|namaskar|good (?:morning|afternoon|evening|night|day)|thanks?|thank you|thankyou|thx|"
+    r"dhanyavad|dhanyawad|shukriya|how are you(?: doing)?|who are you|what can you do|bye|goodbye|see you(?: later| soon)?|"
+    r"take care|ok(?:ay)?|great|nice|cool|awesome|perfect|got it|sounds good|lol|haha)"
+)
+CONVERSATION_FILLERS = r"(?:so much|very much|a lot|again|today|there|ji|sir|madam|friend|buddy|dear|that s|that is|it s|oh|wow|and|too|all|everyone)"
+CONVERSATION_PATTERN = re.compile(rf"(?:{CONVERSATION_FILLERS} )*{CONVERSATION_PHRASES}(?: (?:{CONVERSATION_PHRASES}|{CONVERSATION_FILLERS}))*")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def _stem(token: str) -> str:
+    return token[:-1] if len(token) > 3 and token.endswith("s") else token
+
+class RuleIntentClassifier:
+    def __init__(self, max_conversation_tokens: int = 12):
+        self.max_conversation_tokens = max_conversation_tokens
+        self.tool_nouns = set(DOMAIN_NOUNS)
+        for tool in get_tool_definitions():
+            for token in tool.name.split("_"):
+                if token not in GENERIC_TOOL_TOKENS and token not in ACTION_VERBS:
+                    self.tool_nouns.add(_stem(token))
+
+    def predict(self, user_message: str) -> Optional[Tuple[str, float]]:
+        text = normalize_command(user_message)
+        words = TOKEN_PATTERN.findall(text)
+        if not words:
+            return None
+        if len(words) <= self.max_conversation_tokens and CONVERSATION_PATTERN.fullmatch(" ".join(words)):
+            return "general_conversation", 0.95
+        tokens = {_stem(token) for token in words}
+        noun_hits = tokens & self.tool_nouns
+        verb_hits = tokens & ACTION_VERBS
+        if words[0] in STRONG_ACTION_VERBS or (noun_hits and verb_hits):
+            return "tool_use", 0.95
+        if set(words) & (QUESTION_WORDS | REQUEST_VERBS):
+            return None
+        if len(noun_hits) >= 2:
+            return "tool_use", 0.9
+        return None
+
+class LocalIntentModel:
+    def __init__(self, data_dir: str = "./intent_data", min_examples: int = 30, retrain_every: int = 25):
+        self.examples_path = os.path.join(data_dir, "intent_examples.jsonl")
+        self.model_path = os.path.join(data_dir, "intent_model.pkl")
+        self.min_examples = min_examples
+        self.retrain_every = retrain_every
+        self.pipeline = None
+        self._lock = threading.Lock()
+        self._training = False
+        os.makedirs(data_dir, exist_ok=True)
+        if SKLEARN_AVAILABLE and os.path.exists(self.model_path):
+            try:
+                with open(self.model_path, "rb") as f:
+                    self.pipeline = pickle.load(f)
+            except Exception as e:
+                rprint(Panel(f"[yellow]⚠️ Could not load local intent model:[/yellow] {e}", title="Intent Classifier"))
+        self._example_count = len(self.load_examples())
+        self._next_train_at = self.min_examples if self.pipeline is None else self._example_count + self.retrain_every
+
+    def predict(self, user_message: str) -> Optional[Tuple[str, float]]:
+        pipeline = self.pipeline
+        if pipeline is None:
+            return None
+        probabilities = pipeline.predict_proba([user_message])[0]
+        best = probabilities.argmax()
+        return pipeline.classes_[best], float(probabilities[best])
+
+    def load_examples(self) -> list:
+        if not os.path.exists(self.examples_path):
+            return []
+        with open(self.examples_path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def record(self, user_message: str, intent: str):
+        with self._lock:
+            with open(self.examples_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"message": user_message, "intent": intent}, ensure_ascii=False) + "\n")
+            self._example_count += 1
+            should_train = SKLEARN_AVAILABLE and not self._training and self._example_count >= max(self._next_train_at, self.min_examples)
+            if should_train:
+                self._training = True
+                self._next_train_at = self._example_count + self.retrain_every
+        if should_train:
+            threading.Thread(target=self.train, daemon=True).start()
+
+    def train(self) -> bool:
+        try:
+            examples = self.load_examples()
+            labels = {example["intent"] for example in examples}
+            if not SKLEARN_AVAILABLE or len(examples) < self.min_examples or len(labels) < 2:
+                return False
+            pipeline = make_pipeline(
+                TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, min_df=1),
+                LogisticRegression(max_iter=1000, class_weight="balanced")
+            )
+            pipeline.fit([example["message"] for example in examples], [example["intent"] for example in examples])
+            with open(self.model_path, "wb") as f:
+                pickle.dump(pipeline, f)
+            self.pipeline = pipeline
+            return True
+        finally:
+            self._training = False
+
+def normalize_command(user_message: str) -> str:
+    text = unicodedata.normalize("NFKC", user_message).casefold()
+    kept = [" " if unicodedata.category(char)[0] in "PSCZ" else char for char in text]
+    return " ".join("".join(kept).split())
+
+class IntentCache:
+    def __init__(self, path: str = "./intent_data/intent_cache.db", max_entries: int = 5000, ttl_seconds: float = 7 * 24 * 3600,
+                 version: int = CLASSIFIER_VERSION):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] != version:
+                self.conn.execute("DROP TABLE IF EXISTS intent_cache")
+                self.conn.execute(f"PRAGMA user_version = {int(version)}")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS intent_cache (command TEXT PRIMARY KEY, intent TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)")
+            self.conn.execute("DELETE FROM intent_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        rows = self.conn.execute("SELECT command, intent, created_at FROM intent_cache ORDER BY last_used DESC LIMIT ?", (self.max_entries,)).fetchall()
+        for command, intent, created_at in reversed(rows):
+            self.entries[command] = (intent, created_at)
+
+    def get(self, user_message: str) -> Optional[str]:
+        key = normalize_command(user_message)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            intent, created_at = entry
+            if time.time() - created_at > self.ttl_seconds:
+                self._delete(key)
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            with self.conn:
+                self.conn.execute("UPDATE intent_cache SET last_used = ? WHERE command = ?", (time.time(), key))
+            return intent
+
+    def put(self, user_message: str, intent: str):
+        key = normalize_command(user_message)
+        if not key:
+            return
+        now = time.time()
+        with self._lock:
+            self.entries[key] = (intent, now)
+            self.entries.move_to_end(key)
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO intent_cache (command, intent, created_at, last_used) VALUES (?, ?, ?, ?)", (key, intent, now, now))
+            while len(self.entries) > self.max_entries:
+                oldest_key, _ = self.entries.popitem(last=False)
+                self._delete(oldest_key)
+                self.stats["evictions"] += 1
+
+    def _delete(self, key: str):
+        self.entries.pop(key, None)
+        with self.conn:
+            self.conn.execute("DELETE FROM intent_cache WHERE command = ?", (key,))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "entries": len(self.entries),
+                "hits": self.stats["hits"],
+                "misses": self.stats["misses"],
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+                "evictions": self.stats["evictions"],
+                "expired": self.stats["expired"]
+            }
+
+    def close(self):
+        self.conn.close()
+
 class IntentClassifier:
-    def __init__(self, model_name="gemini-1.5-pro"):
+    def __init__(self, model_name="gemini-1.5-pro", fast_path: bool = True, data_dir: str = "./intent_data", confidence_threshold: float = 0.85):
         self.model = ChatGoogleGenerativeAI(
             model=model_name,
             google_api_key=os.getenv("GENAI_API_KEY"),
             temperature=0
         )
         self.structured_model = self.model.with_structured_output(IntentResponse)
+        self.fast_path = fast_path
+        self.confidence_threshold = confidence_threshold
+        self.rules = RuleIntentClassifier() if fast_path else None
+        self.local_model = LocalIntentModel(data_dir) if fast_path else None
+        self.stats = Counter()
+
+    def classify_locally(self, user_message: str) -> Optional[Tuple[str, str]]:
+        if not self.fast_path:
+            return None
+        prediction = self.rules.predict(user_message)
+        if prediction and prediction[1] >= self.confidence_threshold:
+            return prediction[0], "rules"
+        prediction = self.local_model.predict(user_message)
+        if prediction and prediction[1] >= self.confidence_threshold:
+            return prediction[0], "model"
+        return None
 
     def classify_intent(self, user_message):
+        return self.classify_intent_with_tier(user_message)[0]
+
+    def classify_intent_with_tier(self, user_message) -> Tuple[IntentResponse, str]:
+        local_result = self.classify_locally(user_message)
+        if local_result:
+            intent, tier = local_result
+            self.stats[tier] += 1
+            return IntentResponse(intent=intent), tier
+        response = self.classify_with_llm(user_message)
+        self.stats["llm"] += 1
+        if self.local_model:
+            self.local_model.record(user_message, response.intent)
+        return response, "llm"
+
+    def classify_with_llm(self, user_message):
         prompt = f"""
         🤖 You are an **Expert Intent Classifier** for an AI system that can either:
         - 🛠️ Use specialized tools  
@@ -78,3 +330,84 @@ class IntentClassifier:
         """
 
         return self.structured_model.invoke(prompt)
+
+def run_benchmark(classifier: IntentClassifier, messages: list, use_llm: bool = True) -> dict:
+    local_latencies, llm_latencies = [], []
+    escalated = agreed = compared = 0
+    for message in messages:
+        start = time.perf_counter()
+        local_result = classifier.classify_locally(message)
+        local_latencies.append(time.perf_counter() - start)
+        if not local_result:
+            escalated += 1
+        if not use_llm:
+            continue
+        start = time.perf_counter()
+        llm_intent = classifier.classify_with_llm(message).intent
+        llm_latencies.append(time.perf_counter() - start)
+        if local_result:
+            compared += 1
+            agreed += int(local_result[0] == llm_intent)
+    average_ms = lambda values: round(sum(values) / len(values) * 1000, 3) if values else 0.0
+    return {
+        "messages": len(messages),
+        "answered_locally": len(messages) - escalated,
+        "escalated_to_llm": escalated,
+        "local_avg_ms": average_ms(local_latencies),
+        "llm_avg_ms": average_ms(llm_latencies),
+        "agreement_with_llm": round(agreed / compared, 3) if compared else None
+    }
+
+ROUTING_EXAMPLES = [
+    ("hello!", "general_conversation"),
+    ("thank you so much", "general_conversation"),
+    ("that's great, thanks", "general_conversation"),
+    ("how are you today?", "general_conversation"),
+    ("post good morning on facebook", "tool_use"),
+    ("send the invoice to Alice on WhatsApp", "tool_use"),
+    ("forecast my sales for next month", "tool_use"),
+    ("show me revenue this week", "tool_use"),
+    ("ok so what's my revenue this week", None),
+    ("hey can you tell me stock of mugs", None),
+    ("I saw your post, thanks!", None),
+    ("what do you think about blue pottery?", None),
+]
+
+def check_routing(rules: RuleIntentClassifier, examples: list = ROUTING_EXAMPLES) -> list:
+    failures = []
+    for message, expected in examples:
+        prediction = rules.predict(message)
+        actual = prediction[0] if prediction else None
+        if actual != expected:
+            failures.append((message, expected, actual))
+    return failures
+
+if __name__ == "__main__":
+    console = Console()
+    routing_table = Table(title="🧭 Rule Routing Checks", show_header=True, header_style="bold magenta")
+    routing_table.add_column("Message", style="cyan")
+    routing_table.add_column("Expected", style="yellow")
+    routing_table.add_column("Actual", style="yellow")
+    failures = check_routing(RuleIntentClassifier())
+    for message, expected, actual in failures:
+        routing_table.add_row(message, str(expected or "llm"), str(actual or "llm"))
+    if failures:
+        console.print(routing_table)
+    else:
+        console.print(Panel(f"[green]✅ All {len(ROUTING_EXAMPLES)} routing examples behave as expected[/green]", expand=False))
+
+    console.print(Panel("🚀 [bold green]Intent Classifier Fast-Path Benchmark[/bold green]", expand=False))
+    classifier = IntentClassifier()
+    sample_messages = [example["message"] for example in classifier.local_model.load_examples()] or [
+        "check new comments", "post good morning on facebook", "update daily sales", "hello!", "thank you so much",
+        "how are you today?", "send the invoice to Alice on WhatsApp", "forecast my sales for next month",
+        "what do you think about blue pottery?", "create a poster for the diwali sale", "who are you?",
+        "list all my products", "good night", "can you make my website look more festive", "that's great, thanks"
+    ]
+    results = run_benchmark(classifier, sample_messages, use_llm=bool(os.getenv("GENAI_API_KEY")))
+    table = Table(title="⚡ Local Fast Path vs Gemini", show_header=True, header_style="bold magenta")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="yellow", justify="right")
+    for key, value in results.items():
+        table.add_row(key, str(value))
+    console.print(table)
@@ -1,51 +1,157 @@
 import neo4j
+import copy
 import json
+import time
+import sqlite3
+import difflib
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+import numpy as np
 from rich import print as rprint
 from rich.panel import Panel
 import config
 
-class KnowledgeGraph:
-    def __init__(self):
-        self._driver = None
+class PlanCache:
+    _MISSING = object()
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, negative_ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_command: str) -> str:
+        return " ".join(user_command.lower().split())
+
+    def get(self, user_command: str):
+        key = self._key(user_command)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self.entries.pop(key, None)
+                self.misses += 1
+                return self._MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[0])
+
+    def put(self, user_command: str, plan):
+        ttl = self.ttl_seconds if plan else self.negative_ttl_seconds
+        with self._lock:
+            self.entries[self._key(user_command)] = (copy.deepcopy(plan), time.monotonic() + ttl)
+            self.entries.move_to_end(self._key(user_command))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_command: str, plan: list, drop_negatives: bool):
+        key = self._key(user_command)
+        with self._lock:
+            for cached_key, (cached_plan, _) in list(self.entries.items()):
+                if cached_key == key or cached_plan == plan or (drop_negatives and not cached_plan):
+                    del self.entries[cached_key]
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+class Neo4jPlanStore:
+    name = "neo4j"
+    VECTOR_INDEX_NAME = "command_embedding_index"
+    EMBEDDING_DIMENSIONS = 384
+
+    def __init__(self, embed: Callable[[List[str]], Optional[List[List[float]]]], candidate_pool: int = 10):
+        self.embed = embed
+        self.candidate_pool = candidate_pool
+        self.vector_index_available = False
+        self._driver = neo4j.GraphDatabase.driver(
+            config.NEO4J_URI,
+            auth=(config.NEO4J_USER, config.NEO4J_PASSWORD)
+        )
         try:
-            self._driver = neo4j.GraphDatabase.driver(
-                config.NEO4J_URI,
-                auth=(config.NEO4J_USER, config.NEO4J_PASSWORD)
-            )
             self._driver.verify_connectivity()
-            rprint(Panel.fit("[green]✅ Connected to Neo4j successfully[/green]"))
-        except neo4j.exceptions.ServiceUnavailable as e:
-            rprint(Panel.fit(f"[red]❌ Neo4j connection failed:[/red] {e}"))
+        except Exception:
+            self._driver.close()
+            raise
+        rprint(Panel.fit("[green]✅ Connected to Neo4j successfully[/green]"))
+        self._ensure_vector_index()
+
+    @property
+    def wants_embeddings(self) -> bool:
+        return self.vector_index_available
+
+    def _ensure_vector_index(self):
+        query = f"""
+        CREATE VECTOR INDEX {self.VECTOR_INDEX_NAME} IF NOT EXISTS
+        FOR (c:Command) ON (c.embedding)
+        OPTIONS {{indexConfig: {{`vector.dimensions`: {self.EMBEDDING_DIMENSIONS}, `vector.similarity_function`: 'cosine'}}}}
+        """
+        try:
+            with self._driver.session() as session:
+                session.run(query).consume()
+            self.vector_index_available = True
+            self._backfill_embeddings()
+        except neo4j.exceptions.Neo4jError as e:
+            rprint(Panel.fit(f"[yellow]⚠️ Neo4j vector index unavailable, using Levenshtein scan:[/yellow] {e.message}"))
+
+    def _backfill_embeddings(self, batch_size: int = 256):
+        with self._driver.session() as session:
+            while True:
+                texts = session.execute_read(self._commands_missing_embeddings, batch_size)
+                if not texts:
+                    return
+                embeddings = self.embed(texts)
+                if not embeddings:
+                    return
+                rows = [{"text": text, "embedding": embedding} for text, embedding in zip(texts, embeddings)]
+                session.execute_write(self._set_embeddings, rows)
+                rprint(Panel.fit(f"[cyan]🧮 Embedded {len(rows)} stored command(s) for vector search[/cyan]"))
+
+    @staticmethod
+    def _commands_missing_embeddings(tx, batch_size):
+        result = tx.run("MATCH (c:Command) WHERE c.embedding IS NULL RETURN c.text AS text LIMIT $limit", limit=batch_size)
+        return [record["text"] for record in result]
+
+    @staticmethod
+    def _set_embeddings(tx, rows):
+        tx.run("UNWIND $rows AS row MATCH (c:Command {text: row.text}) SET c.embedding = row.embedding", rows=rows)
 
     def close(self):
-        if self._driver:
-            self._driver.close()
-            rprint(Panel.fit("[yellow]🔌 Neo4j connection closed[/yellow]"))
+        self._driver.close()
+        rprint(Panel.fit("[yellow]🔌 Neo4j connection closed[/yellow]"))
 
     def clean(self):
-        if not self._driver:
-            return
         with self._driver.session() as session:
             session.execute_write(self._delete_all)
-            rprint(Panel.fit("[red]🧹 Knowledge graph cleared[/red]"))
 
     @staticmethod
     def _delete_all(tx):
         tx.run("MATCH (n) DETACH DELETE n")
 
-    def find_successful_plan(self, user_command: str):
-        if not self._driver:
-            return None
+    def find(self, user_command: str, embedding: Optional[List[float]], threshold: float) -> Optional[str]:
         with self._driver.session() as session:
-            result = session.execute_read(self._find_best_successful_plan, user_command)
-            if result:
-                rprint(Panel.fit(f"[cyan]♻️ Found successful plan for similar command:[/cyan] '{user_command}'"))
-                if isinstance(result, str):
-                    return json.loads(result)
-                return result
-            else:
-                rprint(Panel.fit(f"[blue]🤔 No matching successful plan found for:[/blue] '{user_command}'"))
-                return None
+            if embedding:
+                return session.execute_read(self._find_nearest_successful_plan, embedding, self.candidate_pool, threshold)
+            return session.execute_read(self._find_best_successful_plan, user_command)
+
+    @classmethod
+    def _find_nearest_successful_plan(cls, tx, embedding, candidate_pool, threshold):
+        query = f"""
+        CALL db.index.vector.queryNodes('{cls.VECTOR_INDEX_NAME}', $k, $embedding) YIELD node AS c, score AS sim
+        WHERE sim > $threshold
+        MATCH (c)-[r:HAS_SUCCESSFUL_PLAN]->(p:Plan)
+        WHERE NOT (c)-[:HAS_FAILED_PLAN]->(p)
+        RETURN p.plan_json AS plan, sim, r.executions AS executions
+        ORDER BY sim DESC, executions DESC
+        LIMIT 1
+        """
+        result = tx.run(query, k=candidate_pool, embedding=embedding, threshold=threshold)
+        record = result.single()
+        return record["plan"] if record else None
 
     @staticmethod
     def _find_best_successful_plan(tx, user_command):
@@ -61,18 +167,15 @@ class KnowledgeGraph:
         record = result.single()
         return record["plan"] if record else None
 
-    def store_successful_plan(self, user_command: str, plan: list):
-        if not self._driver:
-            return
-        plan_str = json.dumps(plan)
+    def store_success(self, user_command: str, plan_str: str, embedding: Optional[List[float]]):
         with self._driver.session() as session:
-            session.execute_write(self._store_success, user_command, plan_str)
-            rprint(Panel.fit(f"[green]✅ Stored successful plan for:[/green] '{user_command}'"))
+            session.execute_write(self._store_success, user_command, plan_str, embedding)
 
     @staticmethod
-    def _store_success(tx, user_command, plan_str):
+    def _store_success(tx, user_command, plan_str, embedding=None):
         query = """
         MERGE (c:Command {text: $command})
+        SET c.embedding = coalesce(c.embedding, $embedding)
         MERGE (p:Plan {plan_json: $plan_str})
         MERGE (c)-[r:HAS_SUCCESSFUL_PLAN]->(p)
         ON CREATE SET r.executions = 1, r.last_executed = timestamp()
@@ -81,31 +184,247 @@ class KnowledgeGraph:
         OPTIONAL MATCH (c)-[fr:HAS_FAILED_PLAN]->(p)
         DELETE fr
         """
-        tx.run(query, command=user_command, plan_str=plan_str)
+        tx.run(query, command=user_command, plan_str=plan_str, embedding=embedding)
 
-    def store_failed_plan(self, user_command: str, plan: list, feedback: str):
-        if not self._driver:
-            return
-        plan_str = json.dumps(plan)
+    def store_failure(self, user_command: str, plan_str: str, feedback: str, embedding: Optional[List[float]]):
         with self._driver.session() as session:
-            session.execute_write(self._store_failure, user_command, plan_str, feedback)
-            rprint(Panel.fit(f"[yellow]⚠️ Stored failed plan with feedback for:[/yellow] '{user_command}'"))
+            session.execute_write(self._store_failure, user_command, plan_str, feedback, embedding)
 
     @staticmethod
-    def _store_failure(tx, user_command, plan_str, feedback):
+    def _store_failure(tx, user_command, plan_str, feedback, embedding=None):
         query = """
         MERGE (c:Command {text: $command})
+        SET c.embedding = coalesce(c.embedding, $embedding)
         MERGE (p:Plan {plan_json: $plan_str})
         MERGE (c)-[r:HAS_FAILED_PLAN]->(p)
         ON CREATE SET r.failures = 1, r.last_failed = timestamp(), r.last_feedback = $feedback
         ON MATCH SET r.failures = r.failures + 1, r.last_failed = timestamp(), r.last_feedback = $feedback
         """
-        tx.run(query, command=user_command, plan_str=plan_str, feedback=feedback)
+        tx.run(query, command=user_command, plan_str=plan_str, feedback=feedback, embedding=embedding)
+
+class SQLitePlanStore:
+    name = "sqlite"
+    wants_embeddings = True
+
+    def __init__(self, embed: Callable[[List[str]], Optional[List[List[float]]]], db_path: str = "knowledge_graph.db", candidate_pool: int = 10, text_threshold: float = 0.6):
+        self.embed = embed
+        self.db_path = db_path
+        self.candidate_pool = candidate_pool
+        self.text_threshold = text_threshold
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._create_tables()
+        self._index_ids: List[int] = []
+        self._index_texts: List[str] = []
+        self._index_matrix = np.zeros((0, 0), dtype=np.float32)
+        self._backfill_embeddings()
+        self._load_index()
+        rprint(Panel.fit(f"[green]✅ Using embedded SQLite plan store:[/green] {self.db_path}"))
+
+    def _create_tables(self):
+        sql_commands = [
+            "CREATE TABLE IF NOT EXISTS commands (command_id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL UNIQUE, embedding BLOB);",
+            "CREATE TABLE IF NOT EXISTS plans (plan_id INTEGER PRIMARY KEY AUTOINCREMENT, plan_json TEXT NOT NULL UNIQUE);",
+            "CREATE TABLE IF NOT EXISTS successful_plans (command_id INTEGER NOT NULL, plan_id INTEGER NOT NULL, executions INTEGER NOT NULL DEFAULT 1, last_executed REAL NOT NULL, PRIMARY KEY (command_id, plan_id));",
+            "CREATE TABLE IF NOT EXISTS failed_plans (command_id INTEGER NOT NULL, plan_id INTEGER NOT NULL, failures INTEGER NOT NULL DEFAULT 1, last_failed REAL NOT NULL, last_feedback TEXT, PRIMARY KEY (command_id, plan_id));"
+        ]
+        with self._lock, self.conn:
+            for command in sql_commands:
+                self.conn.execute(command)
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _backfill_embeddings(self, batch_size: int = 256):
+        while True:
+            with self._lock:
+                rows = self.conn.execute("SELECT command_id, text FROM commands WHERE embedding IS NULL LIMIT ?", (batch_size,)).fetchall()
+            if not rows:
+                return
+            embeddings = self.embed([row["text"] for row in rows])
+            if not embeddings:
+                return
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    "UPDATE commands SET embedding = ? WHERE command_id = ?",
+                    [(self._normalize(embedding).tobytes(), row["command_id"]) for row, embedding in zip(rows, embeddings)]
+                )
+
+    def _load_index(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT command_id, text, embedding FROM commands").fetchall()
+            self._index_ids = [row["command_id"] for row in rows]
+            self._index_texts = [row["text"] for row in rows]
+            vectors = [np.frombuffer(row["embedding"], dtype=np.float32) for row in rows if row["embedding"] is not None]
+            if vectors and len(vectors) == len(rows):
+                self._index_matrix = np.vstack(vectors)
+            else:
+                self._index_matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def _upsert_command(self, user_command: str, embedding: Optional[List[float]]) -> int:
+        row = self.conn.execute("SELECT command_id, embedding FROM commands WHERE text = ?", (user_command,)).fetchone()
+        vector = self._normalize(embedding) if embedding else None
+        if row:
+            if row["embedding"] is None and vector is not None:
+                self.conn.execute("UPDATE commands SET embedding = ? WHERE command_id = ?", (vector.tobytes(), row["command_id"]))
+                self._load_index()
+            return row["command_id"]
+        cursor = self.conn.execute("INSERT INTO commands (text, embedding) VALUES (?, ?)", (user_command, vector.tobytes() if vector is not None else None))
+        self._index_ids.append(cursor.lastrowid)
+        self._index_texts.append(user_command)
+        if vector is not None and self._index_matrix.shape[0] == len(self._index_ids) - 1:
+            self._index_matrix = vector[None, :] if self._index_matrix.size == 0 else np.vstack([self._index_matrix, vector])
+        else:
+            self._index_matrix = np.zeros((0, 0), dtype=np.float32)
+        return cursor.lastrowid
+
+    def _upsert_plan(self, plan_str: str) -> int:
+        self.conn.execute("INSERT OR IGNORE INTO plans (plan_json) VALUES (?)", (plan_str,))
+        return self.conn.execute("SELECT plan_id FROM plans WHERE plan_json = ?", (plan_str,)).fetchone()["plan_id"]
+
+    def _candidates(self, user_command: str, embedding: Optional[List[float]], threshold: float) -> List[tuple]:
+        if embedding is not None and self._index_matrix.size and self._index_matrix.shape[0] == len(self._index_ids):
+            scores = (1.0 + self._index_matrix @ self._normalize(embedding)) / 2.0
+            top = np.argsort(-scores)[:self.candidate_pool]
+            return [(self._index_ids[i], float(scores[i])) for i in top if scores[i] > threshold]
+        command = user_command.lower()
+        scored = [(command_id, difflib.SequenceMatcher(None, text.lower(), command).ratio()) for command_id, text in zip(self._index_ids, self._index_texts)]
+        return sorted((item for item in scored if item[1] > self.text_threshold), key=lambda item: -item[1])[:self.candidate_pool]
+
+    def find(self, user_command: str, embedding: Optional[List[float]], threshold: float) -> Optional[str]:
+        with self._lock:
+            candidates = self._candidates(user_command, embedding, threshold)
+            if not candidates:
+                return None
+            similarity = dict(candidates)
+            placeholders = ",".join("?" for _ in candidates)
+            rows = self.conn.execute(
+                f"SELECT s.command_id, p.plan_json, s.executions FROM successful_plans s JOIN plans p ON s.plan_id = p.plan_id "
+                f"LEFT JOIN failed_plans f ON f.command_id = s.command_id AND f.plan_id = s.plan_id "
+                f"WHERE s.command_id IN ({placeholders}) AND f.command_id IS NULL",
+                list(similarity)
+            ).fetchall()
+        if not rows:
+            return None
+        best = max(rows, key=lambda row: (similarity[row["command_id"]], row["executions"]))
+        return best["plan_json"]
+
+    def store_success(self, user_command: str, plan_str: str, embedding: Optional[List[float]]):
+        with self._lock, self.conn:
+            command_id = self._upsert_command(user_command, embedding)
+            plan_id = self._upsert_plan(plan_str)
+            self.conn.execute(
+                "INSERT INTO successful_plans (command_id, plan_id, executions, last_executed) VALUES (?, ?, 1, ?) ON CONFLICT(command_id, plan_id) DO UPDATE SET executions = executions + 1, last_executed = excluded.last_executed",
+                (command_id, plan_id, time.time())
+            )
+            self.conn.execute("DELETE FROM failed_plans WHERE command_id = ? AND plan_id = ?", (command_id, plan_id))
+
+    def store_failure(self, user_command: str, plan_str: str, feedback: str, embedding: Optional[List[float]]):
+        with self._lock, self.conn:
+            command_id = self._upsert_command(user_command, embedding)
+            plan_id = self._upsert_plan(plan_str)
+            self.conn.execute(
+                "INSERT INTO failed_plans (command_id, plan_id, failures, last_failed, last_feedback) VALUES (?, ?, 1, ?, ?) ON CONFLICT(command_id, plan_id) DO UPDATE SET failures = failures + 1, last_failed = excluded.last_failed, last_feedback = excluded.last_feedback",
+                (command_id, plan_id, time.time(), feedback)
+            )
+
+    def clean(self):
+        with self._lock, self.conn:
+            for table in ["successful_plans", "failed_plans", "plans", "commands"]:
+                self.conn.execute(f"DELETE FROM {table}")
+            self._load_index()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+        rprint(Panel.fit("[yellow]🔌 SQLite plan store closed[/yellow]"))
+
+class KnowledgeGraph:
+    def __init__(self, similarity_threshold: float = None, candidate_pool: int = 10, backend: str = None):
+        self._embedding_function = None
+        self.similarity_threshold = similarity_threshold or getattr(config, "KG_SIMILARITY_THRESHOLD", 0.9)
+        self.plan_cache = PlanCache(
+            max_entries=getattr(config, "KG_PLAN_CACHE_SIZE", 1024),
+            ttl_seconds=getattr(config, "KG_PLAN_CACHE_TTL_SECONDS", 3600.0),
+            negative_ttl_seconds=getattr(config, "KG_PLAN_CACHE_NEGATIVE_TTL_SECONDS", 30.0)
+        )
+        self.store = self._open_store(backend or getattr(config, "KG_BACKEND", "auto"), candidate_pool)
+
+    def _open_store(self, backend: str, candidate_pool: int):
+        if backend in ("auto", "neo4j"):
+            try:
+                return Neo4jPlanStore(self._embed, candidate_pool=candidate_pool)
+            except Exception as e:
+                rprint(Panel.fit(f"[red]❌ Neo4j connection failed:[/red] {e}"))
+                if backend == "neo4j":
+                    return None
+        return SQLitePlanStore(self._embed, db_path=getattr(config, "KG_SQLITE_PATH", "knowledge_graph.db"), candidate_pool=candidate_pool)
+
+    def _embed(self, texts: List[str]) -> Optional[List[List[float]]]:
+        try:
+            if self._embedding_function is None:
+                from embedding_provider import get_embedding_function
+                self._embedding_function = get_embedding_function()
+            return self._embedding_function.embed_many(texts)
+        except Exception as e:
+            rprint(Panel.fit(f"[yellow]⚠️ Command embedding failed, using text similarity:[/yellow] {e}"))
+            return None
+
+    def _command_embedding(self, user_command: str) -> Optional[List[float]]:
+        if not self.store.wants_embeddings:
+            return None
+        embeddings = self._embed([user_command])
+        return embeddings[0] if embeddings else None
+
+    def close(self):
+        if self.store:
+            self.store.close()
+
+    def clean(self):
+        if not self.store:
+            return
+        self.store.clean()
+        self.plan_cache.clear()
+        rprint(Panel.fit("[red]🧹 Knowledge graph cleared[/red]"))
+
+    def find_successful_plan(self, user_command: str):
+        if not self.store:
+            return None
+        cached = self.plan_cache.get(user_command)
+        if cached is not PlanCache._MISSING:
+            return cached
+        result = self.store.find(user_command, self._command_embedding(user_command), self.similarity_threshold)
+        if result:
+            rprint(Panel.fit(f"[cyan]♻️ Found successful plan for similar command:[/cyan] '{user_command}'"))
+            plan = json.loads(result) if isinstance(result, str) else result
+        else:
+            rprint(Panel.fit(f"[blue]🤔 No matching successful plan found for:[/blue] '{user_command}'"))
+            plan = None
+        self.plan_cache.put(user_command, plan)
+        return plan
+
+    def store_successful_plan(self, user_command: str, plan: list):
+        if not self.store:
+            return
+        self.store.store_success(user_command, json.dumps(plan), self._command_embedding(user_command))
+        self.plan_cache.invalidate(user_command, plan, drop_negatives=True)
+        rprint(Panel.fit(f"[green]✅ Stored successful plan for:[/green] '{user_command}'"))
+
+    def store_failed_plan(self, user_command: str, plan: list, feedback: str):
+        if not self.store:
+            return
+        self.store.store_failure(user_command, json.dumps(plan), feedback, self._command_embedding(user_command))
+        self.plan_cache.invalidate(user_command, plan, drop_negatives=False)
+        rprint(Panel.fit(f"[yellow]⚠️ Stored failed plan with feedback for:[/yellow] '{user_command}'"))
 
 if __name__ == "__main__":
     kg = KnowledgeGraph()
-    if not kg._driver:
-        rprint(Panel.fit("[bold red]Cannot run tests without a Neo4j connection.[/bold red]"))
+    if not kg.store:
+        rprint(Panel.fit("[bold red]Cannot run tests without a plan store.[/bold red]"))
         exit()
 
     complex_success_command = "Find competitor prices for 'blue vase' and list my product on Amazon"
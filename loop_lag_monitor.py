@@ -0,0 +1,51 @@
+import asyncio
+from collections import deque
+from typing import Optional
+from rich import print as rprint
+from rich.panel import Panel
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.1, window: int = 3000):
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.samples)
+        if not samples:
+            return {"samples": 0, "mean_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        percentile = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+        return {
+            "samples": len(samples),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p95_ms": round(percentile(0.95) * 1000, 2),
+            "p99_ms": round(percentile(0.99) * 1000, 2),
+            "max_ms": round(self.max_lag * 1000, 2)
+        }
+
+    def report(self, title: str = "⏱️ Event Loop Lag"):
+        stats = self.snapshot()
+        rprint(Panel(" | ".join(f"{key}: {value}" for key, value in stats.items()), title=title, border_style="cyan", expand=False))
+        return stats
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -1,12 +1,15 @@
 import os
+import re
 import json
 import uuid
 import asyncio
 import threading
 import traceback
-from typing import TypedDict, Annotated, List, Union
+from typing import TypedDict, Annotated, Callable, List, Optional, Union
 from datetime import UTC
 import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
 import cohere
 import config
@@ -16,8 +19,7 @@ from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 from rich.console import Console
 from rich.panel import Panel
-from mcp import ClientSession
-from mcp.client.sse import sse_client
+from rich.live import Live
 
 from tool_definations import get_tool_definitions
 from knowledge_graph import KnowledgeGraph
@@ -25,7 +27,35 @@ from chroma_manager import ChromaDBManager
 from deepgram import DeepgramClient, LiveTranscriptionEvents, LiveOptions
 from elevenlabs.client import ElevenLabs
 from elevenlabs import play
-from intent_classifier import IntentClassifier, IntentResponse
+from intent_classifier import IntentClassifier, IntentCache
+from mcp_client_pool import MCPConnectionPool
+from loop_lag_monitor import LoopLagMonitor
+
+TOOL_OUTPUT_REFERENCE = re.compile(r"\$tool_(\d+)_output")
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+class SentenceChunker:
+    def __init__(self, min_chars: int = 40):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self.buffer += text
+        parts = SENTENCE_BOUNDARY.split(self.buffer)
+        self.buffer = parts.pop()
+        chunks, pending = [], ""
+        for part in parts:
+            pending = f"{pending} {part}".strip()
+            if len(pending) >= self.min_chars:
+                chunks.append(pending)
+                pending = ""
+        if pending:
+            self.buffer = f"{pending} {self.buffer}"
+        return chunks
+
+    def flush(self) -> str:
+        remainder, self.buffer = self.buffer.strip(), ""
+        return remainder
 
 class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], lambda x, y: x + y]
@@ -71,146 +101,244 @@ You are a helpful, friendly AI assistant representing an Indian artisan brand. Y
 - **Privacy:** Never ask for financial information like credit card numbers.
 """
     
-    def __init__(self, role: str = "owner", language="en-IN"):
+    def __init__(self, role: str = "owner", language="en-IN", cohere_client: cohere.Client = None, knowledge_graph: KnowledgeGraph = None, chroma_manager: ChromaDBManager = None, blocking_executor: ThreadPoolExecutor = None, loop_lag_monitor: LoopLagMonitor = None):
         self.console = Console()
-        self.cohere_client = cohere.Client(api_key=config.COHERE_API_KEY)
-        self.knowledge_graph = KnowledgeGraph()
-        self.chroma_manager = ChromaDBManager()
+        self.cohere_client = cohere_client or cohere.Client(api_key=config.COHERE_API_KEY)
+        self.knowledge_graph = knowledge_graph or KnowledgeGraph()
+        self.owns_chroma_manager = chroma_manager is None
+        self.chroma_manager = chroma_manager or ChromaDBManager(
+            batch_size=getattr(config, "CHROMA_WRITE_BATCH_SIZE", 32),
+            flush_interval=getattr(config, "CHROMA_FLUSH_INTERVAL", 0.5)
+        )
+        self.owns_blocking_executor = blocking_executor is None
+        self.blocking_executor = blocking_executor or ThreadPoolExecutor(max_workers=getattr(config, "AGENT_BLOCKING_WORKERS", 8), thread_name_prefix="kala-blocking")
+        self.owns_loop_lag_monitor = loop_lag_monitor is None
+        self.loop_lag_monitor = loop_lag_monitor or LoopLagMonitor()
         self.role = role
         self.language = language
         self.preamble = self.PREAMBLE_OWNER if self.role == "owner" else self.PREAMBLE_CUSTOMER
         self.active_tools = get_tool_definitions() if self.role == "owner" else []
-        self.mcp_session: ClientSession = None
-        self.mcp_sse_client = None
+        self.mcp_pool: MCPConnectionPool = None
+        self.owns_mcp_pool = False
+        self.max_concurrent_tool_calls = getattr(config, "MAX_CONCURRENT_TOOL_CALLS", 4)
+        self.stream_responses = getattr(config, "STREAM_RESPONSES", True)
         self.graph = self._build_graph()
-        self.intent_classifier = IntentClassifier(model_name="gemini-1.5-pro")
+        self.intent_classifier = IntentClassifier(model_name="gemini-1.5-pro", fast_path=getattr(config, "INTENT_FAST_PATH", True))
+        self.intent_cache = IntentCache(
+            max_entries=getattr(config, "INTENT_CACHE_SIZE", 5000),
+            ttl_seconds=getattr(config, "INTENT_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+        ) if self.role == "owner" else None
         self.deepgram_client = DeepgramClient(config.DEEPGRAM_API_KEY)
         self.elevenlabs_client = ElevenLabs(api_key=config.ELEVENLABS_API_KEY)
         self.voice_id = getattr(config, "ELEVENLABS_VOICE_ID", None)
         self.is_speaking = False
         self.stop_playback_event = threading.Event()
+        self.active_response_cancel: Optional[threading.Event] = None
         self.task_queue = asyncio.Queue()
         self.welcome_messages = {
             "en-IN": "🙏 Hello! I'm Kala-Sahayak 🤖 — your creative & strategic ally. How can I help today?",
             "hi-IN": "🙏 नमस्ते! मैं कला-सहायक 🤖 — आपका रचनात्मक और रणनीतिक साथी। मैं आपकी कैसे मदद कर सकता हूँ?"
         }
 
+    @staticmethod
+    def create_mcp_pool(server_url: str = "http://localhost:8080") -> MCPConnectionPool:
+        return MCPConnectionPool(
+            server_url,
+            size=getattr(config, "MCP_POOL_SIZE", 2),
+            ping_interval=getattr(config, "MCP_PING_INTERVAL", 15.0),
+            call_timeout=getattr(config, "MCP_TOOL_CALL_TIMEOUT", 300.0),
+            call_retries=getattr(config, "MCP_TOOL_CALL_RETRIES", 0)
+        )
+
     @classmethod
-    async def create(cls, role: str = "owner", language="en-IN", server_url="http://localhost:8080"):
-        agent = cls(role, language)
-        sse_url = f"{server_url}/sse"
-        agent.console.print(Panel(f"🔌 Connecting to MCP Tool Server via SSE at {sse_url}...", title="MCP Client"))
+    async def create(cls, role: str = "owner", language="en-IN", server_url="http://localhost:8080", mcp_pool: MCPConnectionPool = None, **shared_clients):
+        agent = cls(role, language, **shared_clients)
+        if agent.owns_loop_lag_monitor and getattr(config, "LOOP_LAG_MONITOR", True):
+            agent.loop_lag_monitor.start()
+        if mcp_pool:
+            agent.mcp_pool = mcp_pool
+            return agent
+        agent.console.print(Panel(f"🔌 Connecting to MCP Tool Server via SSE at {server_url}/sse...", title="MCP Client"))
         try:
-            agent.mcp_sse_client = sse_client(sse_url)
-            read_stream, write_stream = await agent.mcp_sse_client.__aenter__()
-            agent.mcp_session = ClientSession(read_stream, write_stream)
-            await agent.mcp_session.initialize()
-            agent.console.print(Panel(f"✅ Successfully connected to: [bold green]{agent.mcp_session.server_info.name}[/]", title="MCP Client"))
+            agent.mcp_pool = await cls.create_mcp_pool(server_url).start()
+            agent.owns_mcp_pool = True
+            agent.console.print(Panel(f"✅ Successfully connected to: [bold green]{agent.mcp_pool.server_name}[/]", title="MCP Client"))
         except Exception as e:
             agent.console.print(Panel(f"❌ Failed to connect to MCP Tool Server: {e}", title="[bold red]Connection Error[/]"))
             raise
         return agent
 
     async def close(self):
-        if self.mcp_sse_client:
-            await self.mcp_sse_client.__aexit__(None, None, None)
+        if self.owns_loop_lag_monitor:
+            await self.loop_lag_monitor.stop()
+            self.loop_lag_monitor.report()
+        if self.intent_cache:
+            stats = self.intent_cache.snapshot()
+            self.console.print(Panel(" | ".join(f"{key}: {value}" for key, value in stats.items()), title="🗂️ Intent Cache", border_style="cyan", expand=False))
+            self.intent_cache.close()
+        if self.owns_chroma_manager:
+            await asyncio.to_thread(self.chroma_manager.close)
+        if self.owns_blocking_executor:
+            self.blocking_executor.shutdown(wait=False)
+        if self.mcp_pool and self.owns_mcp_pool:
+            await self.mcp_pool.close()
             self.console.print(Panel("🔌 MCP SSE connection closed.", title="MCP Client"))
 
     def _emit_status(self, status: str):
         self.console.print(Panel(status, title="⚙️ Agent Status", border_style="bold blue", expand=False))
 
-    def load_memories(self, state: AgentState, config: RunnableConfig):
-        self._emit_status("🧠 Loading Memories...")
-        user_query = state["messages"][-1].content
-        session_id = config["configurable"]["thread_id"]
+    @staticmethod
+    def _get_token_callback(config: RunnableConfig) -> Optional[Callable[[str], None]]:
+        return (config or {}).get("configurable", {}).get("on_token")
+
+    def _chat(self, on_token: Optional[Callable[[str], None]] = None, **chat_kwargs):
+        if not on_token:
+            return self.cohere_client.chat(**chat_kwargs)
+        response = None
+        for event in self.cohere_client.chat_stream(**chat_kwargs):
+            if event.event_type == "text-generation":
+                on_token(event.text)
+            elif event.event_type == "stream-end":
+                response = event.response
+        if response is None:
+            raise RuntimeError("Cohere chat stream ended without a final response.")
+        return response
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.blocking_executor, functools.partial(func, *args, **kwargs))
+
+    async def _recall_memories(self, user_query: str, session_id: str) -> List[str]:
         allowed_speakers = ["owner", "agent"] if self.role == "owner" else ["customer", "agent"]
-        recalled_memories = self.chroma_manager.retrieve_relevant_memories(
-            query=user_query, session_id=session_id, allowed_speaker_types=allowed_speakers
+        recalled_memories = await self._run_blocking(
+            self.chroma_manager.retrieve_relevant_memories, query=user_query, session_id=session_id, allowed_speaker_types=allowed_speakers
         )
         self._emit_status(f"Recalled {len(recalled_memories)} similar memories for context.")
-        if recalled_memories:
-            memory_context = "\n".join(recalled_memories)
-            augmented_message = HumanMessage(content=f"**Recalled Memories (for context only):**\n---\n{memory_context}\n---\n**Current User Request:**\n{user_query}")
-            state["messages"][-1] = augmented_message
-        return {"recalled_memories": recalled_memories, "user_command": user_query}
+        return recalled_memories
 
-    def classify_intent(self, state: AgentState):
-        self._emit_status("🤔 Classifying user intent...")
-        user_message = state["messages"][-1].content
+    async def _classify_intent(self, user_message: str) -> str:
         if self.role == "customer" or not self.active_tools:
             self._emit_status("Intent classified as: [bold]general_conversation[/bold]")
-            return {"intent": "general_conversation"}
-        response: IntentResponse = self.intent_classifier.classify_intent(user_message)
+            return "general_conversation"
+        cached_intent = await self._run_blocking(self.intent_cache.get, user_message)
+        if cached_intent:
+            self._emit_status(f"Intent classified as: [bold]{cached_intent}[/bold] (cached)")
+            return cached_intent
+        response, tier = await self._run_blocking(self.intent_classifier.classify_intent_with_tier, user_message)
         intent = response.intent
+        if tier == "llm":
+            await self._run_blocking(self.intent_cache.put, user_message, intent)
         self._emit_status(f"Intent classified as: [bold]{intent}[/bold]")
-        return {"intent": intent}
+        return intent
 
-    def find_strategic_plan(self, state: AgentState):
+    async def _find_strategic_plan(self, user_command: str):
         if self.role != "owner":
-            return {"cached_plan": None}
-        self._emit_status("🔍 Searching Knowledge Graph for a successful plan...")
-        user_command = state["user_command"]
-        cached_plan = self.knowledge_graph.find_successful_plan(user_command)
+            return None
+        try:
+            cached_plan = await self._run_blocking(self.knowledge_graph.find_successful_plan, user_command)
+        except Exception as e:
+            self._emit_status(f"⚠️ Knowledge Graph lookup failed: {e}")
+            return None
         if cached_plan:
             self._emit_status("♻️ Found a relevant successful plan.")
         else:
             self._emit_status("No relevant successful plan found.")
-        return {"cached_plan": cached_plan}
+        return cached_plan
+
+    async def prepare_turn(self, state: AgentState, config: RunnableConfig):
+        self._emit_status("🧠 Loading memories, 🤔 classifying intent and 🔍 searching the Knowledge Graph...")
+        user_query = state["messages"][-1].content
+        session_id = config["configurable"]["thread_id"]
+        recalled_memories, intent, cached_plan = await asyncio.gather(
+            self._recall_memories(user_query, session_id),
+            self._classify_intent(user_query),
+            self._find_strategic_plan(user_query)
+        )
+        if intent == "general_conversation":
+            cached_plan = None
+        if recalled_memories:
+            memory_context = "\n".join(recalled_memories)
+            augmented_message = HumanMessage(content=f"**Recalled Memories (for context only):**\n---\n{memory_context}\n---\n**Current User Request:**\n{user_query}")
+            state["messages"][-1] = augmented_message
+        return {"recalled_memories": recalled_memories, "user_command": user_query, "intent": intent, "cached_plan": cached_plan}
 
-    def brain_adapt_plan(self, state: AgentState):
+    async def brain_adapt_plan(self, state: AgentState):
         self._emit_status("🧠⚡ Adapting cached plan...")
         user_message = state["user_command"]
         cached_plan = state["cached_plan"]
         message = f"Previous Plan: {json.dumps(cached_plan, indent=2)}\nNew Request: \"{user_message}\"\nUpdate the parameters of the previous plan to fit the new request. Output only the updated `tool_calls`."
-        response = self.cohere_client.chat(message=message, model="command-r-plus", tools=self.active_tools, preamble=self.preamble)
+        response = await self._run_blocking(self.cohere_client.chat, message=message, model="command-r-plus", tools=self.active_tools, preamble=self.preamble)
         return {"messages": [AIMessage(content=response.text, tool_calls=response.tool_calls)]}
 
-    def brain_generate_plan(self, state: AgentState):
+    async def brain_generate_plan(self, state: AgentState, config: RunnableConfig):
         self._emit_status("💡 Generating new plan or continuing task...")
-        response = self.cohere_client.chat(model="command-r-plus", chat_history=[m.model_dump() for m in state["messages"]], tools=self.active_tools, preamble=self.preamble, message="")
+        response = await self._run_blocking(self._chat, on_token=self._get_token_callback(config), model="command-r-plus", chat_history=[m.model_dump() for m in state["messages"]], tools=self.active_tools, preamble=self.preamble, message="")
         last_plan = [tc.model_dump() for tc in response.tool_calls] if response.tool_calls else None
         return {"messages": [AIMessage(content=response.text, tool_calls=response.tool_calls)], "last_plan": last_plan}
 
+    @staticmethod
+    def _tool_call_dependencies(tool_calls: list) -> List[set]:
+        dependencies = []
+        for index, tool_call in enumerate(tool_calls):
+            parameters = json.dumps(tool_call.get("parameters") or {}, default=str)
+            references = {int(ref) for ref in TOOL_OUTPUT_REFERENCE.findall(parameters)}
+            dependencies.append({ref for ref in references if ref < index})
+        return dependencies
+
+    async def _call_remote_tool(self, tool_call: dict) -> ToolMessage:
+        self._emit_status(f"📡 Calling remote tool: {tool_call['name']}...")
+        try:
+            result = await self.mcp_pool.call_tool(
+                tool_call["name"],
+                arguments=tool_call["parameters"]
+            )
+            self._emit_status(f"✅ Success: {tool_call['name']}")
+            return ToolMessage(content=result.content[0].text, tool_call_id=tool_call["id"])
+        except Exception as e:
+            error_message = f"Error calling remote tool {tool_call['name']}: {e}"
+            self._emit_status(f"❌ {error_message}")
+            return ToolMessage(content=json.dumps({"error": error_message}), tool_call_id=tool_call["id"])
+
     async def tool_node(self, state: AgentState):
         last_message = state["messages"][-1]
-        tool_messages = []
-        if not self.mcp_session:
-            raise RuntimeError("MCP session not initialized. Cannot execute tools.")
-
-        for tool_call in last_message.tool_calls:
-            self._emit_status(f"📡 Calling remote tool: {tool_call['name']}...")
-            try:
-                result = await self.mcp_session.call_tool(
-                    tool_call["name"],
-                    arguments=tool_call["parameters"]
-                )
-                tool_messages.append(ToolMessage(content=result.content[0].text, tool_call_id=tool_call["id"]))
-                self._emit_status(f"✅ Success: {tool_call['name']}")
-            except Exception as e:
-                error_message = f"Error calling remote tool {tool_call['name']}: {e}"
-                self._emit_status(f"❌ {error_message}")
-                tool_messages.append(ToolMessage(content=json.dumps({"error": error_message}), tool_call_id=tool_call["id"]))
-        return {"messages": tool_messages}
-
-    def general_conversation_node(self, state: AgentState):
+        if not self.mcp_pool:
+            raise RuntimeError("MCP connection pool not initialized. Cannot execute tools.")
+
+        tool_calls = last_message.tool_calls
+        dependencies = self._tool_call_dependencies(tool_calls)
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrent_tool_calls))
+        tasks = []
+
+        async def run_tool_call(index: int, tool_call: dict) -> ToolMessage:
+            if dependencies[index]:
+                await asyncio.gather(*(tasks[dep] for dep in sorted(dependencies[index])))
+            async with semaphore:
+                return await self._call_remote_tool(tool_call)
+
+        for index, tool_call in enumerate(tool_calls):
+            tasks.append(asyncio.create_task(run_tool_call(index, tool_call)))
+        tool_messages = await asyncio.gather(*tasks)
+        return {"messages": list(tool_messages)}
+
+    async def general_conversation_node(self, state: AgentState, config: RunnableConfig):
         self._emit_status("💬 Engaging in general conversation...")
         user_message = state["messages"][-1]
-        response = self.cohere_client.chat(message=user_message.content, model="command-r", preamble=self.preamble)
+        response = await self._run_blocking(self._chat, on_token=self._get_token_callback(config), message=user_message.content, model="command-r", preamble=self.preamble)
         return {"messages": [AIMessage(content=response.text)]}
         
     def _build_graph(self):
         builder = StateGraph(AgentState)
-        builder.add_node("load_memories", self.load_memories)
-        builder.add_node("classify_intent", self.classify_intent)
-        builder.add_node("find_strategic_plan", self.find_strategic_plan)
+        builder.add_node("prepare_turn", self.prepare_turn)
         builder.add_node("brain_adapt_plan", self.brain_adapt_plan)
         builder.add_node("brain_generate_plan", self.brain_generate_plan)
         builder.add_node("tool_node", self.tool_node)
         builder.add_node("general_conversation_node", self.general_conversation_node)
-        builder.set_entry_point("load_memories")
-        builder.add_edge("load_memories", "classify_intent")
-        builder.add_conditional_edges("classify_intent", lambda state: "general_conversation_node" if state["intent"] == "general_conversation" else "find_strategic_plan")
-        builder.add_conditional_edges("find_strategic_plan", lambda state: "brain_adapt_plan" if state.get("cached_plan") else "brain_generate_plan")
+        builder.set_entry_point("prepare_turn")
+        def route_turn(state):
+            if state["intent"] == "general_conversation":
+                return "general_conversation_node"
+            return "brain_adapt_plan" if state.get("cached_plan") else "brain_generate_plan"
+        builder.add_conditional_edges("prepare_turn", route_turn)
         def should_execute_tools(state):
             return "tool_node" if state["messages"][-1].tool_calls else END
         builder.add_conditional_edges("brain_adapt_plan", should_execute_tools)
@@ -220,17 +348,26 @@ You are a helpful, friendly AI assistant representing an Indian artisan brand. Y
         memory = MemorySaver()
         return builder.compile(checkpointer=memory)
 
-    async def get_agent_response(self, session_id: str, user_text: str, is_feedback: bool = False):
-        config_run = RunnableConfig(configurable={"thread_id": session_id})
+    async def forget_session(self, session_id: str):
+        await self.graph.checkpointer.adelete_thread(session_id)
+
+    async def get_agent_response(self, session_id: str, user_text: str, is_feedback: bool = False, on_token: Optional[Callable[[str], None]] = None):
+        configurable = {"thread_id": session_id}
+        if on_token:
+            loop = asyncio.get_running_loop()
+            configurable["on_token"] = lambda token: loop.call_soon_threadsafe(on_token, token)
+        config_run = RunnableConfig(configurable=configurable)
         if is_feedback:
-            current_state = await self.graph.aget_state(config_run)
-            current_state.messages.append(HumanMessage(content=user_text))
-            stream = self.graph.astream(current_state.model_dump(), config=config_run, stream_mode="values")
+            snapshot = await self.graph.aget_state(config_run)
+            # The checkpoint already holds the thread's messages and the reducer appends, so only send the correction.
+            feedback_state = {key: value for key, value in snapshot.values.items() if key != "messages"}
+            feedback_state["messages"] = [HumanMessage(content=user_text)]
+            stream = self.graph.astream(feedback_state, config=config_run, stream_mode="values")
         else:
             if self.role == "owner":
-                self.chroma_manager.add_owner_message(content=user_text, language=self.language, session_id=session_id)
+                await self._run_blocking(self.chroma_manager.add_owner_message, content=user_text, language=self.language, session_id=session_id)
             else:
-                self.chroma_manager.add_customer_message(content=user_text, language=self.language, session_id=session_id)
+                await self._run_blocking(self.chroma_manager.add_customer_message, content=user_text, language=self.language, session_id=session_id)
             initial_state = {"messages": [HumanMessage(content=user_text)]}
             stream = self.graph.astream(initial_state, config=config_run, stream_mode="values")
 
@@ -248,9 +385,26 @@ You are a helpful, friendly AI assistant representing an Indian artisan brand. Y
             self.console.print(Panel(f"Agent execution error: {e}\n\n{traceback.format_exc()}", title="[bold red]Agent Error[/]", border_style="red"))
             self._emit_status("🚨 Error")
 
-        self.chroma_manager.add_agent_message(content=final_response_text, language=self.language, session_id=session_id)
+        await self._run_blocking(self.chroma_manager.add_agent_message, content=final_response_text, language=self.language, session_id=session_id)
         return final_response_text, last_plan
 
+    async def _get_streamed_text_response(self, session_id: str, user_text: str, is_feedback: bool = False):
+        partial_tokens = []
+        with Live(Panel("...", title="🤖 Agent Response", border_style="magenta"), console=self.console, refresh_per_second=12) as live:
+            def on_token(token: str):
+                partial_tokens.append(token)
+                live.update(Panel("".join(partial_tokens), title="🤖 Agent Response", border_style="magenta"))
+            response_text, last_plan = await self.get_agent_response(session_id, user_text, is_feedback=is_feedback, on_token=on_token)
+            live.update(Panel(response_text, title="🤖 Agent Response", border_style="magenta"))
+        return response_text, last_plan
+
+    async def _get_text_response(self, session_id: str, user_text: str, is_feedback: bool = False):
+        if self.stream_responses:
+            return await self._get_streamed_text_response(session_id, user_text, is_feedback=is_feedback)
+        response_text, last_plan = await self.get_agent_response(session_id, user_text, is_feedback=is_feedback)
+        self.console.print(Panel(response_text, title="🤖 Agent Response", border_style="magenta"))
+        return response_text, last_plan
+
     async def run_text_agent(self):
         self.console.print(Panel("⌨️ Text Mode Active. Type 'quit' or 'exit' to end.", title="💬 Conversation"))
         thread_id, user_command_for_session, last_plan_for_session = str(uuid.uuid4()), "", None
@@ -260,46 +414,86 @@ You are a helpful, friendly AI assistant representing an Indian artisan brand. Y
                 if user_input.lower() in ["quit", "exit"]:
                     self.console.print("[bold red]🚪 Exiting...[/bold red]"); self.knowledge_graph.close(); break
                 user_command_for_session = user_input
-                response_text, last_plan = await self.get_agent_response(thread_id, user_command_for_session)
+                response_text, last_plan = await self._get_text_response(thread_id, user_command_for_session)
                 last_plan_for_session = last_plan
             
-            self.console.print(Panel(response_text, title="🤖 Agent Response", border_style="magenta"))
-            
             if self.role == "owner" and last_plan_for_session:
                 feedback_input = await asyncio.to_thread(self.console.input, "👍 Was this result helpful? (yes/no or provide correction): ")
                 if feedback_input.lower() in ["yes", "y"]:
-                    self.knowledge_graph.store_successful_plan(user_command_for_session, last_plan_for_session)
+                    await self._run_blocking(self.knowledge_graph.store_successful_plan, user_command_for_session, last_plan_for_session)
                     self.console.print(Panel("✅ Glad I could help! Plan saved.", title="✨ Session", border_style="green"))
                     user_command_for_session, last_plan_for_session = "", None
                 elif feedback_input.lower() in ["no", "n"]:
-                    self.knowledge_graph.store_failed_plan(user_command_for_session, last_plan_for_session, "User was not satisfied.")
+                    await self._run_blocking(self.knowledge_graph.store_failed_plan, user_command_for_session, last_plan_for_session, "User was not satisfied.")
                     self.console.print(Panel("📝 Understood. Let's try a different approach.", title="🔄 Correcting", border_style="yellow"))
                     user_command_for_session, last_plan_for_session = "", None
                 else:
-                    self.knowledge_graph.store_failed_plan(user_command_for_session, last_plan_for_session, feedback_input)
+                    await self._run_blocking(self.knowledge_graph.store_failed_plan, user_command_for_session, last_plan_for_session, feedback_input)
                     self.console.print(Panel("📝 Thank you. I will try again with the new information.", title="🔄 Correcting", border_style="yellow"))
                     correction_message = f"My previous attempt was incorrect. The user provided this feedback: '{feedback_input}'. Please create a new plan."
-                    response_text, last_plan = await self.get_agent_response(thread_id, correction_message, is_feedback=True)
+                    response_text, last_plan = await self._get_text_response(thread_id, correction_message, is_feedback=True)
                     last_plan_for_session = last_plan
             else:
                 user_command_for_session, last_plan_for_session = "", None
     
+    def _play_speech(self, text: str):
+        try:
+            audio_stream = self.elevenlabs_client.text_to_speech.convert(voice_id=self.voice_id, text=text, model_id="eleven_multilingual_v2")
+            play(audio_stream, interrupt_event=self.stop_playback_event)
+        except Exception as e:
+            self.console.print(f"[bold red]🔇 TTS Error: {e}[/bold red]")
+        finally:
+            self.is_speaking = False
+
     async def speak(self, text: str):
         self.is_speaking = True
         self.stop_playback_event.clear()
-        def play_audio_thread():
-            try:
-                audio_stream = self.elevenlabs_client.text_to_speech.convert(voice_id=self.voice_id, text=text, model_id="eleven_multilingual_v2")
-                play(audio_stream, interrupt_event=self.stop_playback_event)
-            except Exception as e:
-                self.console.print(f"[bold red]🔇 TTS Error: {e}[/bold red]")
-            finally:
-                self.is_speaking = False
-        await asyncio.to_thread(threading.Thread(target=play_audio_thread, daemon=True).start)
+        await asyncio.to_thread(threading.Thread(target=self._play_speech, args=(text,), daemon=True).start)
+
+    async def _speak_chunks(self, chunks: asyncio.Queue, cancelled: threading.Event):
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            if cancelled.is_set():
+                continue
+            self.is_speaking = True
+            await asyncio.to_thread(self._play_speech, chunk)
+
+    async def _get_spoken_response(self, session_id: str, user_text: str, is_feedback: bool = False):
+        if not self.stream_responses:
+            response_text, last_plan = await self.get_agent_response(session_id, user_text, is_feedback=is_feedback)
+            await self.speak(response_text)
+            return response_text, last_plan
+        chunker, chunks, streamed = SentenceChunker(), asyncio.Queue(), []
+        cancelled = threading.Event()
+        self.active_response_cancel = cancelled
+        self.stop_playback_event.clear()
+        speaker_task = asyncio.create_task(self._speak_chunks(chunks, cancelled))
+        def on_token(token: str):
+            streamed.append(token)
+            for sentence in chunker.feed(token):
+                chunks.put_nowait(sentence)
+        try:
+            response_text, last_plan = await self.get_agent_response(session_id, user_text, is_feedback=is_feedback, on_token=on_token)
+            remainder = chunker.flush()
+            if response_text.strip() != "".join(streamed).strip():
+                remainder = response_text
+            if remainder:
+                chunks.put_nowait(remainder)
+        finally:
+            chunks.put_nowait(None)
+            await speaker_task
+            if self.active_response_cancel is cancelled:
+                self.active_response_cancel = None
+        return response_text, last_plan
 
     def interrupt_speech(self):
-        if self.is_speaking:
+        cancelled = self.active_response_cancel
+        if self.is_speaking or (cancelled and not cancelled.is_set()):
             self.console.print("[yellow]⏹️ Speech interrupted[/yellow]")
+            if cancelled:
+                cancelled.set()
             self.stop_playback_event.set()
 
     async def listen(self):
@@ -318,21 +512,19 @@ You are a helpful, friendly AI assistant representing an Indian artisan brand. Y
     async def _process_voice_tasks(self, thread_id: str):
         while True:
             user_command = await self.task_queue.get()
-            response_text, last_plan = await self.get_agent_response(thread_id, user_command)
-            await self.speak(response_text)
+            response_text, last_plan = await self._get_spoken_response(thread_id, user_command)
             
             if self.role == "owner" and last_plan:
                 await self.speak("Was this result helpful?")
                 feedback_command = await self.task_queue.get()
                 if feedback_command.lower() in ["yes", "yep", "haan"]:
-                    self.knowledge_graph.store_successful_plan(user_command, last_plan)
+                    await self._run_blocking(self.knowledge_graph.store_successful_plan, user_command, last_plan)
                     await self.speak("Great! Plan saved. What's next?")
                 else:
-                    self.knowledge_graph.store_failed_plan(user_command, last_plan, feedback_command)
+                    await self._run_blocking(self.knowledge_graph.store_failed_plan, user_command, last_plan, feedback_command)
                     await self.speak("Understood. I will try again with your feedback.")
                     correction_message = f"My previous attempt was incorrect. User feedback: '{feedback_command}'. Please create a new plan."
-                    new_response, new_plan = await self.get_agent_response(thread_id, correction_message, is_feedback=True)
-                    await self.speak(new_response)
+                    new_response, new_plan = await self._get_spoken_response(thread_id, correction_message, is_feedback=True)
 
     async def run_voice_agent(self):
         self.console.print(Panel("[bold cyan]🚀 Kala-Sahayak Voice Agent Online[/]", title="🖥️ System Status"))
@@ -0,0 +1,175 @@
+import asyncio
+import random
+from typing import List, Optional
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.shared.exceptions import McpError
+from rich import print as rprint
+from rich.panel import Panel
+
+
+class MCPConnection:
+    def __init__(self, sse_url: str, index: int):
+        self.sse_url = sse_url
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.server_name: Optional[str] = None
+        self.healthy = False
+        self.in_flight = 0
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    async def open(self, timeout: float):
+        self._ready.clear()
+        self._stop.clear()
+        self._error = None
+        self._task = asyncio.create_task(self._run())
+        await asyncio.wait_for(self._ready.wait(), timeout)
+        if not self.healthy:
+            raise ConnectionError(f"MCP connection #{self.index} failed to open: {self._error}")
+
+    async def _run(self):
+        try:
+            async with sse_client(self.sse_url) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as session:
+                    result = await session.initialize()
+                    self.server_name = result.serverInfo.name
+                    self.session = session
+                    self.healthy = True
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.session = None
+            self.healthy = False
+            self._ready.set()
+
+    async def close(self):
+        self._stop.set()
+        if self._task:
+            if self.session is None and not self._task.done():
+                self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class MCPConnectionPool:
+    def __init__(self, server_url: str, size: int = 2, ping_interval: float = 15.0, connect_timeout: float = 10.0,
+                 call_timeout: float = 300.0, max_backoff: float = 30.0, call_retries: int = 0):
+        self.sse_url = f"{server_url}/sse"
+        self.size = max(1, size)
+        self.ping_interval = ping_interval
+        self.connect_timeout = connect_timeout
+        self.call_timeout = call_timeout
+        self.max_backoff = max_backoff
+        self.call_retries = call_retries
+        self.connections: List[MCPConnection] = [MCPConnection(self.sse_url, i) for i in range(self.size)]
+        self._available = asyncio.Event()
+        self._reconnect_tasks = {}
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def server_name(self) -> Optional[str]:
+        return next((c.server_name for c in self.connections if c.server_name), None)
+
+    @property
+    def healthy_connections(self) -> int:
+        return sum(1 for c in self.connections if c.healthy)
+
+    async def start(self):
+        rprint(Panel(f"🔌 Opening {self.size} MCP connection(s) to {self.sse_url}...", title="MCP Pool"))
+        await asyncio.gather(*(self._connect(c) for c in self.connections))
+        if not self.healthy_connections:
+            raise ConnectionError(f"Could not open any MCP connection to {self.sse_url}")
+        for connection in self.connections:
+            if not connection.healthy:
+                self._schedule_reconnect(connection)
+        self._monitor_task = asyncio.create_task(self._monitor())
+        rprint(Panel(f"✅ MCP pool ready: {self.healthy_connections}/{self.size} connection(s) to [bold green]{self.server_name}[/]", title="MCP Pool"))
+        return self
+
+    async def _connect(self, connection: MCPConnection) -> bool:
+        try:
+            await connection.open(self.connect_timeout)
+            self._available.set()
+            return True
+        except Exception as e:
+            await connection.close()
+            rprint(Panel(f"[yellow]⚠️ MCP connection #{connection.index} unavailable:[/yellow] {e}", title="MCP Pool"))
+            return False
+
+    def _schedule_reconnect(self, connection: MCPConnection):
+        connection.healthy = False
+        if not self.healthy_connections:
+            self._available.clear()
+        task = self._reconnect_tasks.get(connection.index)
+        if self._closing or (task and not task.done()):
+            return
+        self._reconnect_tasks[connection.index] = asyncio.create_task(self._reconnect(connection))
+
+    async def _reconnect(self, connection: MCPConnection):
+        delay = 1.0
+        while not self._closing:
+            await connection.close()
+            if await self._connect(connection):
+                rprint(Panel(f"🔄 MCP connection #{connection.index} re-established.", title="MCP Pool"))
+                return
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            delay = min(delay * 2, self.max_backoff)
+
+    async def _monitor(self):
+        while not self._closing:
+            await asyncio.sleep(self.ping_interval)
+            for connection in self.connections:
+                if not connection.healthy or connection.session is None:
+                    self._schedule_reconnect(connection)
+                    continue
+                try:
+                    await asyncio.wait_for(connection.session.send_ping(), self.connect_timeout)
+                except Exception:
+                    rprint(Panel(f"[yellow]⚠️ MCP connection #{connection.index} failed its liveness ping.[/yellow]", title="MCP Pool"))
+                    self._schedule_reconnect(connection)
+
+    async def _acquire(self) -> MCPConnection:
+        while True:
+            candidates = [c for c in self.connections if c.healthy and c.session is not None]
+            if candidates:
+                return min(candidates, key=lambda c: c.in_flight)
+            for connection in self.connections:
+                self._schedule_reconnect(connection)
+            try:
+                await asyncio.wait_for(self._available.wait(), self.connect_timeout)
+            except asyncio.TimeoutError:
+                raise ConnectionError("No healthy MCP connection available.")
+
+    async def call_tool(self, name: str, arguments: dict = None):
+        last_error = None
+        for _ in range(self.call_retries + 1):
+            connection = await self._acquire()
+            connection.in_flight += 1
+            try:
+                return await asyncio.wait_for(connection.session.call_tool(name, arguments=arguments), self.call_timeout)
+            except McpError:
+                raise
+            except Exception as e:
+                last_error = e
+                self._schedule_reconnect(connection)
+            finally:
+                connection.in_flight -= 1
+        raise last_error
+
+    async def close(self):
+        self._closing = True
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            await asyncio.gather(self._monitor_task, return_exceptions=True)
+        for task in self._reconnect_tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._reconnect_tasks.values(), return_exceptions=True)
+        await asyncio.gather(*(c.close() for c in self.connections), return_exceptions=True)
+        rprint(Panel("🔌 MCP connection pool closed.", title="MCP Pool"))
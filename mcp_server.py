@@ -1,5 +1,7 @@
 import os
 import asyncio
+from typing import Annotated
+from pydantic import Field
 from mcp.server.fastmcp import FastMCP
 from rich.console import Console
 from rich.panel import Panel
@@ -53,6 +55,10 @@ async def bizintel_generate_content_calendar(topic: str, duration_days: int):
 async def bizintel_predictive_sales_forecast(sales_csv_path: str, forecast_periods: int):
     return await asyncio.to_thread(bi_api.predictive_sales_forecast, sales_csv_path, forecast_periods)
 
+@mcp.tool()
+async def bizintel_forecast_sales_from_database(forecast_periods: int = 3, product_name: str = None):
+    return await asyncio.to_thread(lambda: bi_api.forecast_sales(data_manager.get_daily_sales_frame(product_name=product_name), forecast_periods, product_name))
+
 @mcp.tool()
 async def bizintel_create_invoice(save_path: str, order_details: dict):
     return await asyncio.to_thread(bi_api.create_invoice, save_path, order_details)
@@ -226,16 +232,32 @@ async def data_manager_get_all_customers():
     return await asyncio.to_thread(data_manager.get_all_customers)
 
 @mcp.tool()
-async def data_manager_get_customer_details_and_orders(customer_identifier: str):
-    return await asyncio.to_thread(data_manager.get_customer_details_and_orders, customer_identifier)
+async def data_manager_get_customer_details_and_orders(customer_identifier: str, limit: Annotated[int, Field(ge=1, le=DataManager.MAX_PAGE_SIZE)] = 20, cursor: str = None):
+    return await asyncio.to_thread(data_manager.get_customer_details_and_orders, customer_identifier, limit, cursor)
+
+@mcp.tool()
+async def data_manager_bulk_create_orders(orders: list):
+    return await asyncio.to_thread(data_manager.bulk_create_orders, orders)
+
+@mcp.tool()
+async def data_manager_update_daily_sales(for_date: str = None, end_date: str = None):
+    return await asyncio.to_thread(data_manager.update_daily_sales, for_date, end_date)
+
+@mcp.tool()
+async def data_manager_export_sales_to_csv(file_path: str, incremental: bool = False):
+    return await asyncio.to_thread(data_manager.export_sales_to_csv, file_path, incremental)
+
+@mcp.tool()
+async def data_manager_export_sales_to_parquet(file_path: str, incremental: bool = False):
+    return await asyncio.to_thread(data_manager.export_sales_to_parquet, file_path, incremental)
 
 @mcp.tool()
-async def data_manager_update_daily_sales(for_date: str = None):
-    return await asyncio.to_thread(data_manager.update_daily_sales, for_date)
+async def data_manager_get_sales_rollup(grain: str = "month", start_date: str = None, end_date: str = None, product_name: str = None, by_product: bool = False):
+    return await asyncio.to_thread(data_manager.get_sales_rollup, grain, start_date, end_date, product_name, by_product)
 
 @mcp.tool()
-async def data_manager_export_sales_to_csv(file_path: str):
-    return await asyncio.to_thread(data_manager.export_sales_to_csv, file_path)
+async def data_manager_get_best_sales_period(grain: str = "day", start_date: str = None, end_date: str = None, product_name: str = None, metric: str = "total_revenue"):
+    return await asyncio.to_thread(data_manager.get_best_sales_period, grain, start_date, end_date, product_name, metric)
 
 @mcp.tool()
 async def data_manager_get_sales_on_date(date_str: str):
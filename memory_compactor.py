@@ -0,0 +1,211 @@
+import json
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+import numpy as np
+from rich import print as rprint
+from rich.panel import Panel
+from rich.table import Table
+
+from chroma_manager import ChromaDBManager
+
+
+def extractive_summary(turns: List[dict], max_chars: int = 160) -> str:
+    lines = []
+    for turn in turns:
+        text = " ".join(turn["message"].split())
+        lines.append(f"{turn['role']}: {text[:max_chars]}{'…' if len(text) > max_chars else ''}")
+    return "\n".join(lines)
+
+
+def make_cohere_summarizer(cohere_client, model: str = "command-r") -> Callable[[List[dict]], str]:
+    def summarize(turns: List[dict]) -> str:
+        transcript = "\n".join(f"{turn['role']}: {turn['message']}" for turn in turns)
+        prompt = f"""Summarise the following part of a conversation between a shop owner or customer and their assistant.
+Keep names, products, quantities, prices, dates, order IDs and any decisions. Write at most 5 short sentences.
+
+Conversation:
+{transcript}
+"""
+        try:
+            return cohere_client.chat(message=prompt, model=model, temperature=0.0).text.strip()
+        except Exception as e:
+            rprint(Panel(f"[yellow]⚠️ LLM summarisation failed, using extractive summary:[/yellow] {e}", title="Memory Compactor"))
+            return extractive_summary(turns)
+    return summarize
+
+
+class MemoryCompactor:
+    def __init__(self, chroma_manager: ChromaDBManager, summarizer: Callable[[List[dict]], str] = None,
+                 keep_recent_turns: int = 50, summary_chunk_turns: int = 20, tool_retention_days: float = 7.0,
+                 dedupe_threshold: float = 0.98, interval: float = 3600.0):
+        self.chroma_manager = chroma_manager
+        self.summarizer = summarizer or extractive_summary
+        self.keep_recent_turns = keep_recent_turns
+        self.summary_chunk_turns = summary_chunk_turns
+        self.tool_retention_days = tool_retention_days
+        self.dedupe_threshold = dedupe_threshold
+        self.interval = interval
+        self.last_stats: Optional[dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="chroma-compactor", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                rprint(Panel(f"[red]❌ Memory compaction failed:[/red] {e}", title="Memory Compactor"))
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _expired_tool_ids(self, messages: List[dict], cutoff_seq: int) -> List[str]:
+        expiry = (datetime.utcnow() - timedelta(days=self.tool_retention_days)).isoformat()
+        return [m["id"] for m in messages
+                if m["metadata"].get("role") == "TOOL" and m["metadata"]["seq"] < cutoff_seq and m["metadata"]["timestamp"] < expiry]
+
+    def _duplicate_ids(self, messages: List[dict]) -> List[str]:
+        duplicates, previous_group, previous_vector = [], None, None
+        for message in messages:
+            group = (message["metadata"].get("role"), message["metadata"].get("speaker_type"))
+            if message["embedding"] is None:
+                previous_group, previous_vector = group, None
+                continue
+            vector = np.asarray(message["embedding"], dtype=np.float32)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+            if group == previous_group and previous_vector is not None and float(previous_vector @ vector) >= self.dedupe_threshold:
+                duplicates.append(message["id"])
+                continue
+            previous_group, previous_vector = group, vector
+        return duplicates
+
+    def _turn(self, message: dict) -> dict:
+        role = message["metadata"].get("role", "USER")
+        if role != "TOOL":
+            return {"role": role, "message": message["content"]}
+        try:
+            calls = json.loads(message["content"]).get("calls", [])
+            return {"role": "TOOL", "message": "called " + ", ".join(call.get("name", "?") for call in calls)}
+        except (json.JSONDecodeError, AttributeError):
+            return {"role": "TOOL", "message": "tool call"}
+
+    def compact_session(self, session_id: str) -> dict:
+        stats = {"expired_tool_payloads": 0, "deduplicated": 0, "summarised_turns": 0, "summaries_written": 0}
+        candidates = self.chroma_manager.get_compaction_candidates(session_id, self.keep_recent_turns)
+        messages, cutoff_seq = candidates["messages"], candidates["cutoff_seq"]
+
+        expired = set(self._expired_tool_ids(messages, cutoff_seq))
+        old = [m for m in messages if m["metadata"]["seq"] < cutoff_seq and m["id"] not in expired and m["metadata"].get("role") != "SUMMARY"]
+        duplicates = set(self._duplicate_ids(old))
+        old = [m for m in old if m["id"] not in duplicates]
+
+        summaries, summarised_ids = [], []
+        full_chunks = len(old) - len(old) % self.summary_chunk_turns
+        for start in range(0, full_chunks, self.summary_chunk_turns):
+            chunk = old[start:start + self.summary_chunk_turns]
+            last = chunk[-1]["metadata"]
+            summaries.append((self.summarizer([self._turn(m) for m in chunk]), {
+                "session_id": session_id,
+                "seq": last["seq"],
+                "role": "SUMMARY",
+                "timestamp": last["timestamp"],
+                "language": chunk[0]["metadata"].get("language", ""),
+                "speaker_type": "agent",
+                "summarised_turns": len(chunk)
+            }))
+            summarised_ids.extend(m["id"] for m in chunk)
+
+        if self.chroma_manager.apply_compaction(session_id, list(expired | duplicates) + summarised_ids, summaries):
+            stats.update(expired_tool_payloads=len(expired), deduplicated=len(duplicates), summarised_turns=len(summarised_ids), summaries_written=len(summaries))
+        return stats
+
+    def run_once(self) -> dict:
+        started = time.perf_counter()
+        stats = {"sessions": 0, "documents_before": self.chroma_manager.collection.count(),
+                 "expired_tool_payloads": 0, "deduplicated": 0, "summarised_turns": 0, "summaries_written": 0}
+        for session_id in self.chroma_manager.list_sessions():
+            for key, value in self.compact_session(session_id).items():
+                stats[key] += value
+            stats["sessions"] += 1
+        stats["documents_after"] = self.chroma_manager.collection.count()
+        stats["seconds"] = round(time.perf_counter() - started, 2)
+        self.last_stats = stats
+        return stats
+
+    def report(self, stats: dict = None):
+        stats = stats or self.last_stats or {}
+        table = Table(title="🧹 Memory Compaction")
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", justify="right")
+        for key, value in stats.items():
+            table.add_row(key, str(value))
+        rprint(table)
+        return stats
+
+
+def run_demo(manager: ChromaDBManager, session_id: str = "compaction-demo") -> dict:
+    manager.clear_session_history(session_id)
+    for day in range(1, 11):
+        manager.add_owner_message(session_id, f"How many mugs did we sell on day {day}?", "en")
+        manager.add_agent_message(session_id, "Let me check the sales records for you.", "en")
+    manager.add_agent_message(session_id, "Let me check the sales records for you.", "en")
+    manager.add_owner_message(session_id, "Thanks, that's all.", "en")
+
+    compactor = MemoryCompactor(manager, keep_recent_turns=1, summary_chunk_turns=10)
+    stats = compactor.compact_session(session_id)
+    summaries = [entry["message"] for entry in manager.get_formatted_history(session_id, limit=50)
+                 if entry["message"].startswith("Summary of earlier conversation")]
+    assert stats["deduplicated"] == 1, stats
+    assert stats["summaries_written"] == 2 and len(summaries) == 2, (stats, summaries)
+    for summary in summaries:
+        assert "USER:" in summary and "CHATBOT:" in summary, summary
+    manager.clear_session_history(session_id)
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact the Kala-Sahayak conversation memory store")
+    parser.add_argument("--path", type=str, default="./chroma_db")
+    parser.add_argument("--keep-recent", type=int, default=50)
+    parser.add_argument("--chunk", type=int, default=20)
+    parser.add_argument("--tool-retention-days", type=float, default=7.0)
+    parser.add_argument("--llm", action="store_true", help="Summarise with Cohere instead of the extractive summary")
+    parser.add_argument("--demo", action="store_true", help="Compact a throwaway session and check both sides of the conversation survive")
+    args = parser.parse_args()
+
+    if args.demo:
+        manager = ChromaDBManager(path=args.path)
+        try:
+            MemoryCompactor(manager).report(run_demo(manager))
+            rprint(Panel("[green]✅ Summaries keep both the owner's and the agent's turns[/green]", title="Memory Compactor"))
+        finally:
+            manager.close()
+        raise SystemExit(0)
+
+    summarizer = None
+    if args.llm:
+        import cohere
+        import config
+        summarizer = make_cohere_summarizer(cohere.Client(api_key=config.COHERE_API_KEY))
+
+    manager = ChromaDBManager(path=args.path)
+    compactor = MemoryCompactor(manager, summarizer=summarizer, keep_recent_turns=args.keep_recent,
+                                summary_chunk_turns=args.chunk, tool_retention_days=args.tool_retention_days)
+    try:
+        compactor.report(compactor.run_once())
+    finally:
+        manager.close()
@@ -18,12 +18,20 @@ def get_tool_definitions() -> List[Tool]:
         ),
         Tool(
             name="bizintel_predictive_sales_forecast",
-            description="Analyzes historical sales data from a CSV to forecast future sales.",
+            description="Analyzes historical sales data from an external CSV or Parquet file to forecast future sales. For the shop's own sales, use bizintel_forecast_sales_from_database instead.",
             parameter_definitions={
                 "sales_csv_path": {"type": "string", "description": "The local file path to the sales data CSV.", "required": True},
                 "forecast_periods": {"type": "int", "description": "The number of future periods to forecast."}
             }
         ),
+        Tool(
+            name="bizintel_forecast_sales_from_database",
+            description="Forecasts future daily revenue directly from the shop's recorded daily sales, without exporting a file first.",
+            parameter_definitions={
+                "forecast_periods": {"type": "int", "description": "The number of future days to forecast. Defaults to 3.", "required": False},
+                "product_name": {"type": "string", "description": "Forecast a single product instead of the whole shop.", "required": False}
+            }
+        ),
         Tool(
             name="bizintel_analyze_customer_feedback",
             description="Analyzes customer comments to identify themes, sentiment, and insights.",
@@ -201,23 +209,64 @@ def get_tool_definitions() -> List[Tool]:
         ),
         Tool(
             name="data_manager_get_customer_details_and_orders",
-            description="Retrieves full details and the complete order history for a specific customer.",
+            description="Retrieves full details and the order history for a specific customer, newest orders first, one page at a time. If 'next_cursor' in the result is not null, call again with that cursor to get older orders.",
+            parameter_definitions={
+                "customer_identifier": {"type": "string", "description": "The ID, name, or contact info of the customer to look up.", "required": True},
+                "limit": {"type": "int", "description": "Maximum number of orders to return, between 1 and 100. Defaults to 20.", "required": False},
+                "cursor": {"type": "string", "description": "The 'next_cursor' value from a previous call, to fetch the next page of older orders.", "required": False}
+            }
+        ),
+        Tool(
+            name="data_manager_bulk_create_orders",
+            description="Imports many orders at once, e.g. when backfilling marketplace or CSV sales. Each order is an object with 'customer_identifier', 'items' (objects with 'product_id', 'quantity', 'price_per_item'), 'shipping_address' and optional 'tracking_number' and ISO 'order_date'. Invalid orders are reported by index in 'errors' without stopping the import.",
             parameter_definitions={
-                "customer_identifier": {"type": "string", "description": "The ID, name, or contact info of the customer to look up.", "required": True}
+                "orders": {"type": "array", "description": "The list of order objects to import.", "required": True}
             }
         ),
         Tool(
             name="data_manager_update_daily_sales",
-            description="Aggregates orders into the daily sales summary table for a specific date. Defaults to today if no date is provided. Should be run once at the end of the day.",
+            description="Refreshes the daily sales summary table. With no dates, it incrementally rolls up only the days touched by orders added since the last refresh, whatever their order date. With 'for_date' (and optionally 'end_date'), it rebuilds that day or inclusive date range from scratch, removing stale rows, e.g. after orders were edited or deleted.",
             parameter_definitions={
-                "for_date": {"type": "string", "description": "The date to summarize sales for, e.g., 'today', 'yesterday'. Defaults to the current day.", "required": False}
+                "for_date": {"type": "string", "description": "First day to rebuild, e.g. '2024-05-01', 'yesterday'. Omit both dates for the incremental refresh.", "required": False},
+                "end_date": {"type": "string", "description": "Last day to rebuild, inclusive. Defaults to 'for_date', i.e. a single day.", "required": False}
             }
         ),
         Tool(
             name="data_manager_export_sales_to_csv",
             description="Exports the daily sales data to a CSV file for analysis.",
             parameter_definitions={
-                "file_path": {"type": "string", "description": "The local path to save the CSV file.", "required": True}
+                "file_path": {"type": "string", "description": "The local path to save the CSV file.", "required": True},
+                "incremental": {"type": "bool", "description": "If true, append only the product-days that changed since the last incremental export to this file, including back-dated orders and rebuilt days. A date and product can appear again with new totals (0 when the sales were removed), so readers must keep the last row per date and product. Defaults to false.", "required": False}
+            }
+        ),
+        Tool(
+            name="data_manager_export_sales_to_parquet",
+            description="Exports the daily sales data to a columnar Parquet file, which is smaller and faster to load for forecasting than CSV.",
+            parameter_definitions={
+                "file_path": {"type": "string", "description": "The local path of the .parquet file, or of a dataset directory when incremental is true.", "required": True},
+                "incremental": {"type": "bool", "description": "If true, write only the product-days that changed since the last incremental export as a new part file in the dataset directory. A date and product can appear again in a later part with new totals, so readers must keep the last row per date and product. Defaults to false.", "required": False}
+            }
+        ),
+        Tool(
+            name="data_manager_get_sales_rollup",
+            description="Returns pre-aggregated sales totals per day, week (starting Monday) or month, for the whole shop or per product. Use it for questions like 'sales last month by product' or 'weekly revenue since March'.",
+            parameter_definitions={
+                "grain": {"type": "string", "description": "'day', 'week' or 'month'. Defaults to 'month'.", "required": False},
+                "start_date": {"type": "string", "description": "First date to include, e.g. 'last month', '2024-01-01'. The whole period containing it is included.", "required": False},
+                "end_date": {"type": "string", "description": "Last date to include, e.g. 'today'. The whole period containing it is included.", "required": False},
+                "product_name": {"type": "string", "description": "Restrict the results to one product.", "required": False},
+                "by_product": {"type": "bool", "description": "If true, break each period down by product, best sellers first. Defaults to false (shop-wide totals).", "required": False}
+            }
+        ),
+        Tool(
+            name="data_manager_get_best_sales_period",
+            description="Finds the best day, week or month within a date range by revenue or units sold, for the whole shop or for one product. Use it for questions like 'best day this quarter'.",
+            parameter_definitions={
+                "grain": {"type": "string", "description": "'day', 'week' or 'month'. Defaults to 'day'.", "required": False},
+                "start_date": {"type": "string", "description": "Start of the range, e.g. '90 days ago'.", "required": False},
+                "end_date": {"type": "string", "description": "End of the range, e.g. 'today'.", "required": False},
+                "product_name": {"type": "string", "description": "Restrict the search to one product.", "required": False},
+                "metric": {"type": "string", "description": "'total_revenue' (default) or 'quantity_sold'.", "required": False}
             }
         ),
         Tool(